@@ -18,11 +18,21 @@ class CoreConfig(AppConfig):
         """Initialize the FBS Core app"""
         # Import signals to ensure they're registered
         import apps.core.signals
+        apps.core.signals.connect_model_signals()
 
         # Initialize audit logging
         from apps.core.utils.audit import setup_audit_logging
         setup_audit_logging()
 
-        # Setup system settings cache
-        from apps.core.utils.settings import initialize_system_settings
-        initialize_system_settings()
\ No newline at end of file
+        # The system settings registry loads itself on first lookup; querying
+        # here would run for every management command, even without a database
+
+        # Precompute model routing categories for FBSDatabaseRouter
+        from apps.core.middleware.database_router import build_routing_table
+        build_routing_table()
+
+        # Pre-register tenant database aliases when the first request starts
+        # (not here: ready() also runs for migrate, collectstatic, ...)
+        from django.core.signals import request_started
+        from apps.core.utils.tenant_connections import preload_on_first_request
+        request_started.connect(preload_on_first_request, dispatch_uid='fbs_preload_tenant_aliases')
@@ -1,2 +1,14 @@
 # FBS Authentication Package
+from .token_auth import (
+    FBSTokenAuthentication,
+    FBSHandshakeAuthentication,
+    create_user_session_token,
+    validate_session_token,
+)
 
+__all__ = [
+    'FBSTokenAuthentication',
+    'FBSHandshakeAuthentication',
+    'create_user_session_token',
+    'validate_session_token',
+]
@@ -0,0 +1,118 @@
+"""
+FBS Verified API Key Cache
+
+LRU+TTL cache of verified API key hashes with the principal and scopes they
+resolve to, so hot API clients authenticate without touching Postgres.
+
+Entries are dropped as soon as the token, its user or its solution changes
+(see ``apps.core.signals``). The TTL bounds staleness for changes made in
+other worker processes. Unknown keys are cached briefly as misses so
+repeated bad keys do not hit the database either.
+"""
+import copy
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from ..utils.lru import LRUCache
+
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 300  # seconds
+DEFAULT_NEGATIVE_TTL = 30  # seconds
+
+# Cached marker for hashes that matched no active token
+UNKNOWN_KEY = object()
+
+
+class VerifiedAPIKey:
+    """An active API token resolved from a key hash"""
+
+    __slots__ = ('token_id', 'token_hash', 'user', 'user_id', 'solution_id', 'scopes',
+                 'expires_at', 'user_is_active', 'solution_is_active')
+
+    def __init__(self, api_token):
+        user = api_token.user
+        self.token_id = api_token.pk
+        self.token_hash = api_token.token
+        self.user = user
+        self.user_id = user.pk
+        self.solution_id = user.solution_id
+        self.scopes = tuple(api_token.scopes or ())
+        self.expires_at = api_token.expires_at.timestamp() if api_token.expires_at else None
+        self.user_is_active = user.is_active
+        self.solution_is_active = user.solution.is_active
+
+    def is_expired(self) -> bool:
+        """Check expiry against the cached ``expires_at``"""
+        return self.expires_at is not None and time.time() > self.expires_at
+
+    def get_user(self):
+        """Get a per-request copy of the cached user"""
+        return copy.copy(self.user)
+
+
+def _build_cache() -> LRUCache:
+    config = getattr(settings, 'FBS_CONFIG', {}).get('API_KEY_CACHE', {})
+    return LRUCache(
+        maxsize=config.get('MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+        ttl=config.get('TTL', DEFAULT_TTL),
+    )
+
+
+_verified_keys = _build_cache()
+_negative_ttl = getattr(settings, 'FBS_CONFIG', {}).get('API_KEY_CACHE', {}).get(
+    'NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+
+
+def get_verified_key(token_hash: str):
+    """
+    Look up a key hash.
+
+    Returns a ``VerifiedAPIKey``, ``UNKNOWN_KEY`` for a cached miss, or
+    ``None`` when the hash has not been seen.
+    """
+    return _verified_keys.get(token_hash)
+
+
+def cache_verified_key(api_token) -> VerifiedAPIKey:
+    """Cache a token loaded with ``select_related('user__solution')``"""
+    verified = VerifiedAPIKey(api_token)
+    _verified_keys.set(verified.token_hash, verified, expires_at=verified.expires_at)
+    return verified
+
+
+def cache_unknown_key(token_hash: str):
+    """Remember that a hash matched no active token"""
+    _verified_keys.set(token_hash, UNKNOWN_KEY, ttl=_negative_ttl)
+
+
+def invalidate_key(token_hash: Optional[str]):
+    """Drop a cached key, e.g. after revocation or expiry changes"""
+    if token_hash:
+        _verified_keys.delete(token_hash)
+
+
+def invalidate_user(user_id):
+    """Drop cached keys belonging to a user"""
+    _verified_keys.discard_where(
+        lambda key, value: value is not UNKNOWN_KEY and value.user_id == user_id
+    )
+
+
+def invalidate_solution(solution_id):
+    """Drop cached keys belonging to any user of a solution"""
+    _verified_keys.discard_where(
+        lambda key, value: value is not UNKNOWN_KEY and value.solution_id == solution_id
+    )
+
+
+def clear():
+    """Drop all cached keys"""
+    _verified_keys.clear()
+
+
+def stats():
+    """Cache statistics for monitoring"""
+    return _verified_keys.stats()
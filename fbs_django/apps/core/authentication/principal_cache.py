@@ -0,0 +1,82 @@
+"""
+FBS Verified Principal Cache
+
+Caches the result of resolving a JWT payload to a user, keyed by
+``(user_id, solution_id, iat)``, so steady-state JWT authentication does not
+query the database.
+
+Entries hold the user (with its solution loaded) plus the user and solution
+active flags. They are invalidated by the ``post_save``/``post_delete``
+handlers for ``FBSUser`` and ``FBSSolution`` in ``apps.core.signals``; the TTL
+bounds staleness for changes made in other worker processes.
+"""
+import copy
+from typing import Optional
+
+from django.conf import settings
+
+from ..utils.lru import LRUCache
+
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 300  # seconds
+
+
+class VerifiedPrincipal:
+    """A user resolved from a token, with the flags authentication checks"""
+
+    __slots__ = ('user', 'user_id', 'solution_id', 'user_is_active', 'solution_is_active')
+
+    def __init__(self, user):
+        self.user = user
+        self.user_id = user.pk
+        self.solution_id = user.solution_id
+        self.user_is_active = user.is_active
+        self.solution_is_active = user.solution.is_active
+
+    def get_user(self):
+        """Get a per-request copy of the cached user"""
+        return copy.copy(self.user)
+
+
+def _build_cache() -> LRUCache:
+    jwt_config = getattr(settings, 'FBS_CONFIG', {}).get('JWT', {})
+    return LRUCache(
+        maxsize=jwt_config.get('PRINCIPAL_CACHE_SIZE', DEFAULT_MAX_ENTRIES),
+        ttl=jwt_config.get('PRINCIPAL_CACHE_TTL', DEFAULT_TTL),
+    )
+
+
+_principals = _build_cache()
+
+
+def get_principal(user_id, solution_id, iat) -> Optional[VerifiedPrincipal]:
+    """Get a cached principal for a token's claims"""
+    return _principals.get((user_id, solution_id, iat))
+
+
+def cache_principal(user, iat, expires_at: Optional[float] = None) -> VerifiedPrincipal:
+    """Cache the principal for a user loaded with ``select_related('solution')``"""
+    principal = VerifiedPrincipal(user)
+    _principals.set((user.pk, user.solution_id, iat), principal, expires_at=expires_at)
+    return principal
+
+
+def invalidate_user(user_id):
+    """Drop cached principals for a user"""
+    _principals.discard_where(lambda key, value: value.user_id == user_id)
+
+
+def invalidate_solution(solution_id):
+    """Drop cached principals for every user of a solution"""
+    _principals.discard_where(lambda key, value: value.solution_id == solution_id)
+
+
+def clear():
+    """Drop all cached principals"""
+    _principals.clear()
+
+
+def stats():
+    """Cache statistics for monitoring"""
+    return _principals.stats()
@@ -6,19 +6,70 @@ Supports solution-scoped tokens and API key authentication.
 """
 import jwt
 import json
+import hashlib
+import hmac
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Tuple
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db.models import Q
+from django.dispatch import receiver
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from ..models import FBSSolution, FBSAPIToken
+from ..utils.lru import LRUCache
+from . import api_key_cache, principal_cache
+from .token_usage import token_usage
 
 
 User = get_user_model()
 
+# Leading characters of a plain API key stored for indexed lookup
+API_KEY_PREFIX_LENGTH = 8
+
+
+def hash_api_key(token: str) -> str:
+    """Hash a plain API key the way it is stored in ``FBSAPIToken.token``"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class JWTConfig:
+    """JWT key material and claims, resolved once from settings"""
+
+    __slots__ = ('secret_key', 'algorithm', 'algorithms', 'issuer', 'audience', 'leeway')
+
+    def __init__(self, jwt_settings: dict):
+        self.secret_key = jwt_settings.get('SECRET_KEY') or getattr(settings, 'SECRET_KEY', 'fbs-jwt-secret')
+        self.algorithm = jwt_settings.get('ALGORITHM', 'HS256')
+        self.algorithms = [self.algorithm]
+        self.issuer = jwt_settings.get('ISSUER', 'fbs-suite')
+        self.audience = jwt_settings.get('AUDIENCE', 'fbs-api')
+        self.leeway = jwt_settings.get('LEEWAY', 0)
+
+
+@lru_cache(maxsize=None)
+def get_jwt_config() -> JWTConfig:
+    """Get the compiled JWT configuration"""
+    return JWTConfig(getattr(settings, 'FBS_CONFIG', {}).get('JWT', {}))
+
+
+# Verified token -> payload, each entry evicted when the token expires
+_decoded_tokens = LRUCache(
+    maxsize=getattr(settings, 'FBS_CONFIG', {}).get('JWT', {}).get('DECODE_CACHE_SIZE', 10000)
+)
+
+
+@receiver(setting_changed)
+def _reset_jwt_config(setting, **kwargs):
+    """Recompile JWT configuration when the settings it depends on change"""
+    if setting in ('FBS_CONFIG', 'SECRET_KEY'):
+        get_jwt_config.cache_clear()
+        _decoded_tokens.clear()
+
 
 class FBSTokenAuthentication(BaseAuthentication):
     """
@@ -27,12 +78,31 @@ class FBSTokenAuthentication(BaseAuthentication):
     Supports both JWT tokens and API keys for multi-tenant authentication.
     """
 
+    # Outcome memoised on the underlying HttpRequest, so the tenant router
+    # and DRF authenticate (and record API key usage) once per request
+    REQUEST_CACHE_ATTR = '_fbs_token_authentication'
+
     def authenticate(self, request) -> Optional[Tuple[User, None]]:
         """
         Authenticate the request using FBS token.
 
         Returns (user, None) if authentication succeeds, None otherwise.
         """
+        http_request = getattr(request, '_request', request)
+        outcome = getattr(http_request, self.REQUEST_CACHE_ATTR, None)
+        if outcome is None:
+            try:
+                outcome = (self._authenticate(request), None)
+            except AuthenticationFailed as e:
+                outcome = (None, e)
+            setattr(http_request, self.REQUEST_CACHE_ATTR, outcome)
+
+        result, error = outcome
+        if error is not None:
+            raise error
+        return result
+
+    def _authenticate(self, request) -> Optional[Tuple[User, None]]:
         token = self.get_token_from_request(request)
         if not token:
             return None
@@ -63,105 +133,137 @@ class FBSTokenAuthentication(BaseAuthentication):
         if fbs_token:
             return fbs_token
 
-        # Check query parameters (less secure, but useful for debugging)
-        token_param = request.GET.get('token') or request.POST.get('token')
-        if token_param and getattr(settings, 'DEBUG', False):
-            return token_param
+        # Query-string token for debugging only; the body is never read here,
+        # since request.POST would parse it before the view runs
+        if getattr(settings, 'DEBUG', False):
+            return request.GET.get('token') or None
 
         return None
 
     def decode_jwt_token(self, token: str) -> Optional[dict]:
-        """Decode and validate JWT token"""
-        try:
-            # Get JWT settings
-            jwt_config = getattr(settings, 'FBS_CONFIG', {}).get('JWT', {})
-            secret_key = jwt_config.get('SECRET_KEY') or getattr(settings, 'SECRET_KEY', 'fbs-jwt-secret')
-            algorithm = jwt_config.get('ALGORITHM', 'HS256')
-
-            # Decode token
-            payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+        """
+        Decode and validate JWT token.
 
-            # Validate expiration
-            if payload.get('exp'):
-                exp_timestamp = payload['exp']
-                if isinstance(exp_timestamp, int):
-                    exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.get_current_timezone())
-                    if timezone.now() > exp_datetime:
-                        return None
+        PyJWT verifies signature, ``exp``, ``aud`` and ``iss``. Verified
+        payloads are cached until the token expires, so a client re-sending
+        the same bearer token is not re-verified on every request.
+        """
+        # API keys and other non-JWT tokens never reach the decoder
+        if token.count('.') != 2:
+            return None
 
-            return payload
+        payload = _decoded_tokens.get(token)
+        if payload is not None:
+            return dict(payload)
 
-        except jwt.ExpiredSignatureError:
-            return None
+        jwt_config = get_jwt_config()
+        try:
+            payload = jwt.decode(
+                token,
+                jwt_config.secret_key,
+                algorithms=jwt_config.algorithms,
+                audience=jwt_config.audience,
+                issuer=jwt_config.issuer,
+                leeway=jwt_config.leeway,
+            )
         except jwt.InvalidTokenError:
+            # Includes ExpiredSignatureError
             return None
         except Exception:
             return None
 
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)):
+            _decoded_tokens.set(token, payload, expires_at=exp)
+
+        return dict(payload)
+
     def authenticate_jwt_payload(self, payload: dict) -> Tuple[User, None]:
-        """Authenticate user from JWT payload"""
+        """
+        Authenticate user from JWT payload.
+
+        Resolved principals are cached by ``(user_id, solution_id, iat)`` so a
+        token that has already been verified costs no database queries.
+        """
         user_id = payload.get('user_id')
         solution_id = payload.get('solution_id')
 
         if not user_id or not solution_id:
             raise AuthenticationFailed('Invalid token payload')
 
-        try:
-            # Get user and solution
-            user = User.objects.select_related('solution').get(id=user_id)
-            solution = FBSSolution.objects.get(id=solution_id)
+        iat = payload.get('iat')
+        principal = principal_cache.get_principal(user_id, solution_id, iat)
+
+        if principal is None:
+            try:
+                # The user's solution comes with the same query
+                user = User.objects.select_related('solution').get(id=user_id)
+            except User.DoesNotExist:
+                raise AuthenticationFailed('User not found')
 
             # Validate solution match
-            if user.solution != solution:
+            if user.solution_id != solution_id:
                 raise AuthenticationFailed('Token solution mismatch')
 
-            # Check if user is active
-            if not user.is_active:
-                raise AuthenticationFailed('User account is disabled')
-
-            # Check if solution is active
-            if not solution.is_active:
-                raise AuthenticationFailed('Solution is inactive')
+            principal = principal_cache.cache_principal(user, iat, expires_at=payload.get('exp'))
 
-            # Attach solution to request for middleware
-            # This will be set by the authentication middleware
+        # Check if user is active
+        if not principal.user_is_active:
+            raise AuthenticationFailed('User account is disabled')
 
-            return (user, None)
+        # Check if solution is active
+        if not principal.solution_is_active:
+            raise AuthenticationFailed('Solution is inactive')
 
-        except User.DoesNotExist:
-            raise AuthenticationFailed('User not found')
-        except FBSSolution.DoesNotExist:
-            raise AuthenticationFailed('Solution not found')
+        return (principal.get_user(), None)
 
     def authenticate_api_key(self, token: str) -> Optional[Tuple[User, None]]:
-        """Authenticate using API key"""
-        try:
-            # Get API token from database
-            api_token = FBSAPIToken.objects.select_related('user__solution').get(
-                token=token,
-                is_active=True
-            )
+        """
+        Authenticate using API key.
+
+        The presented key is hashed and matched against stored hashes via the
+        key prefix index. Verified keys are cached, so repeat requests from
+        the same client do not query the database.
+        """
+        token_hash = hash_api_key(token)
+        verified = api_key_cache.get_verified_key(token_hash)
 
-            # Check expiration
-            if api_token.is_expired():
-                raise AuthenticationFailed('API token has expired')
+        if verified is None:
+            verified = self._verify_api_key(token, token_hash)
 
-            # Check user and solution status
-            user = api_token.user
-            if not user.is_active:
-                raise AuthenticationFailed('User account is disabled')
+        if verified is api_key_cache.UNKNOWN_KEY:
+            return None
 
-            if not user.solution.is_active:
-                raise AuthenticationFailed('Solution is inactive')
+        # Check expiration
+        if verified.is_expired():
+            raise AuthenticationFailed('API token has expired')
 
-            # Update last used timestamp
-            api_token.last_used_at = timezone.now()
-            api_token.save(update_fields=['last_used_at'])
+        # Check user and solution status
+        if not verified.user_is_active:
+            raise AuthenticationFailed('User account is disabled')
 
-            return (user, None)
+        if not verified.solution_is_active:
+            raise AuthenticationFailed('Solution is inactive')
 
-        except FBSAPIToken.DoesNotExist:
-            return None
+        # Record usage; last_used_at and usage_count are written in bulk
+        token_usage.record(verified.token_id)
+
+        return (verified.get_user(), None)
+
+    def _verify_api_key(self, token: str, token_hash: str):
+        """Look up an API key hash in the database and cache the outcome"""
+        candidates = FBSAPIToken.objects.select_related('user__solution').filter(
+            # Tokens issued before prefixes were stored are matched on the hash
+            Q(token_prefix=token[:API_KEY_PREFIX_LENGTH]) | Q(token_prefix='', token=token_hash),
+            is_active=True,
+        )
+
+        for api_token in candidates:
+            if hmac.compare_digest(api_token.token, token_hash):
+                return api_key_cache.cache_verified_key(api_token)
+
+        api_key_cache.cache_unknown_key(token_hash)
+        return api_key_cache.UNKNOWN_KEY
 
     @classmethod
     def generate_jwt_token(cls, user: User, solution: FBSSolution,
@@ -171,10 +273,7 @@ class FBSTokenAuthentication(BaseAuthentication):
             # Default to 24 hours
             expires_in = timedelta(hours=24)
 
-        # Get JWT settings
-        jwt_config = getattr(settings, 'FBS_CONFIG', {}).get('JWT', {})
-        secret_key = jwt_config.get('SECRET_KEY') or getattr(settings, 'SECRET_KEY', 'fbs-jwt-secret')
-        algorithm = jwt_config.get('ALGORITHM', 'HS256')
+        jwt_config = get_jwt_config()
 
         # Create payload
         now = timezone.now()
@@ -185,12 +284,12 @@ class FBSTokenAuthentication(BaseAuthentication):
             'solution_name': solution.name,
             'iat': int(now.timestamp()),
             'exp': int((now + expires_in).timestamp()),
-            'iss': 'fbs-suite',
-            'aud': 'fbs-api',
+            'iss': jwt_config.issuer,
+            'aud': jwt_config.audience,
         }
 
         # Generate token
-        token = jwt.encode(payload, secret_key, algorithm=algorithm)
+        token = jwt.encode(payload, jwt_config.secret_key, algorithm=jwt_config.algorithm)
 
         return token
 
@@ -199,17 +298,17 @@ class FBSTokenAuthentication(BaseAuthentication):
                         expires_at: datetime = None) -> FBSAPIToken:
         """Generate a new API key for the user"""
         import secrets
-        import hashlib
 
         # Generate secure token
         token_plain = secrets.token_urlsafe(32)
-        token_hash = hashlib.sha256(token_plain.encode()).hexdigest()
+        token_hash = hash_api_key(token_plain)
 
         # Create API token
         api_token = FBSAPIToken.objects.create(
             user=user,
             name=name,
             token=token_hash,  # Store hash for security
+            token_prefix=token_plain[:API_KEY_PREFIX_LENGTH],
             scopes=scopes or ['read'],
             expires_at=expires_at,
         )
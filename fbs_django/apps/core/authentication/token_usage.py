@@ -0,0 +1,112 @@
+"""
+FBS API Token Usage Tracking
+
+Write-behind buffer for ``FBSAPIToken.last_used_at`` and ``usage_count``.
+
+API-key requests record usage in process memory; a background worker
+flushes the buffer every ``FLUSH_INTERVAL`` seconds with one UPDATE per
+chunk of tokens, so read-only API calls no longer cost a write each.
+"""
+import logging
+import threading
+from typing import Dict, List
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, F, PositiveBigIntegerField, Value, When
+from django.utils import timezone
+
+from ..utils.background import PeriodicWorker
+
+
+logger = logging.getLogger('fbs.auth')
+
+DEFAULT_FLUSH_INTERVAL = 10  # seconds
+DEFAULT_MAX_BUFFERED_TOKENS = 1000
+UPDATE_CHUNK_SIZE = 500
+
+
+class TokenUsageBuffer:
+    """In-memory buffer of per-token last use time and request count"""
+
+    def __init__(self):
+        config = getattr(settings, 'FBS_CONFIG', {}).get('API_TOKEN_USAGE', {})
+        self.max_buffered_tokens = config.get('MAX_BUFFERED_TOKENS', DEFAULT_MAX_BUFFERED_TOKENS)
+        self._lock = threading.Lock()
+        # token id -> [last_used_at, request count]
+        self._pending: Dict[int, list] = {}
+        self._worker = PeriodicWorker(
+            'fbs-token-usage',
+            config.get('FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            self.flush,
+        )
+
+    def record(self, token_id: int, used_at=None):
+        """Record one request authenticated with a token"""
+        used_at = used_at or timezone.now()
+        with self._lock:
+            entry = self._pending.get(token_id)
+            if entry is None:
+                self._pending[token_id] = [used_at, 1]
+            else:
+                entry[0] = max(entry[0], used_at)
+                entry[1] += 1
+            pending = len(self._pending)
+
+        self._worker.start()
+        if pending >= self.max_buffered_tokens:
+            self._worker.wake()
+
+    def flush(self) -> int:
+        """Write buffered usage to the database; returns the number of tokens updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        try:
+            for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+                self._write(items[start:start + UPDATE_CHUNK_SIZE])
+        except Exception:
+            # Put the usage back so it is retried on the next flush
+            self._requeue(pending)
+            raise
+
+        return len(items)
+
+    def _write(self, items: List[tuple]):
+        """Apply one chunk of usage with a single UPDATE"""
+        from ..models import FBSAPIToken
+
+        last_used = Case(
+            *[When(pk=token_id, then=Value(used_at)) for token_id, (used_at, _) in items],
+            output_field=DateTimeField(),
+        )
+        increments = Case(
+            *[When(pk=token_id, then=Value(count)) for token_id, (_, count) in items],
+            default=Value(0),
+            output_field=PositiveBigIntegerField(),
+        )
+        FBSAPIToken.objects.filter(pk__in=[token_id for token_id, _ in items]).update(
+            last_used_at=last_used,
+            usage_count=F('usage_count') + increments,
+        )
+
+    def _requeue(self, pending: Dict[int, list]):
+        with self._lock:
+            for token_id, (used_at, count) in pending.items():
+                entry = self._pending.get(token_id)
+                if entry is None:
+                    self._pending[token_id] = [used_at, count]
+                else:
+                    entry[0] = max(entry[0], used_at)
+                    entry[1] += count
+
+    def pending_count(self) -> int:
+        """Number of tokens with unflushed usage"""
+        return len(self._pending)
+
+
+# Process-wide buffer
+token_usage = TokenUsageBuffer()
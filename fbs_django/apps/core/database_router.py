@@ -0,0 +1,9 @@
+"""
+FBS Database Router
+
+Entry point referenced by ``settings.DATABASE_ROUTERS``. The router lives
+alongside its middleware so both share the same tenant context.
+"""
+from .middleware.database_router import FBSDatabaseRouter
+
+__all__ = ['FBSDatabaseRouter']
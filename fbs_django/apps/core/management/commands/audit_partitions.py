@@ -0,0 +1,69 @@
+"""
+Manage FBSAuditLog monthly partitions and retention.
+
+    python manage.py audit_partitions --convert        # one-off conversion
+    python manage.py audit_partitions                  # create upcoming partitions
+    python manage.py audit_partitions --retention      # also enforce retention
+
+Every database holding an audit table (each tenant database, plus
+``default`` if it has one) is processed unless ``--database`` picks one.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from apps.core.utils import audit_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming audit log partitions and enforce audit retention policies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database',
+                            help='Only process this database alias (default: every audit database)')
+        parser.add_argument('--convert', action='store_true',
+                            help='Convert the plain audit table into a partitioned table')
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='Number of future monthly partitions to keep ready')
+        parser.add_argument('--retention', action='store_true',
+                            help='Drop expired partitions and delete rows past per-solution retention')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what retention would remove without removing it')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            databases = [(options['database'], None)]
+        else:
+            databases = audit_partitions.get_audit_databases()
+
+        failed = []
+        for using, solution_id in databases:
+            self.stdout.write(self.style.MIGRATE_HEADING(using))
+            try:
+                self._process(using, solution_id, options)
+            except (RuntimeError, DatabaseError) as e:
+                self.stderr.write(self.style.ERROR(f"{using}: {e}"))
+                failed.append(using)
+
+        if failed:
+            raise CommandError(f"Audit partition maintenance failed on: {', '.join(failed)}")
+
+    def _process(self, using, solution_id, options):
+        if options['convert']:
+            audit_partitions.convert_to_partitioned(options['months_ahead'], using=using)
+            self.stdout.write(self.style.SUCCESS('Audit table converted to monthly partitions'))
+
+        if not audit_partitions.is_partitioned(using):
+            raise RuntimeError('Audit table is not partitioned; run with --convert first')
+
+        created = audit_partitions.ensure_partitions(options['months_ahead'], using=using)
+        self.stdout.write(f"Partitions ready: {', '.join(created)}")
+
+        if options['retention']:
+            result = audit_partitions.apply_retention(
+                using=using, dry_run=options['dry_run'],
+                solution_ids=None if solution_id is None else [solution_id],
+            )
+            prefix = 'Would drop' if options['dry_run'] else 'Dropped'
+            self.stdout.write(f"{prefix} partitions: {', '.join(result['dropped_partitions']) or 'none'}")
+            for solution, count in result['deleted_rows'].items():
+                self.stdout.write(f"Solution {solution}: {count} rows past retention")
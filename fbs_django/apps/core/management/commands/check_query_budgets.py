@@ -0,0 +1,45 @@
+"""
+Check the query count of every core ViewSet list and detail endpoint.
+
+    python manage.py check_query_budgets --username admin
+
+Fails when an endpoint runs more queries than its entry in
+apps.core.utils.query_budget.VIEWSET_QUERY_BUDGETS.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.utils.query_budget import check_viewset_query_budgets
+
+
+class Command(BaseCommand):
+    help = 'Assert the maximum query count of the core API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True,
+                            help='User to call the endpoints as (a superuser sees every row)')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.select_related('solution').filter(
+            username=options['username']).first()
+        if user is None:
+            raise CommandError(f"User {options['username']} not found")
+
+        failures = 0
+        for result in check_viewset_query_budgets(user):
+            label = f"{result['view']}.{result['action']}"
+            if result['skipped']:
+                self.stdout.write(f'{label:<28} skipped (no rows)')
+                continue
+
+            line = f"{label:<28} {result['queries']:>3} / {result['budget']} queries"
+            if result['ok']:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(line))
+                for sql, count in result['duplicates'].items():
+                    self.stdout.write(f'    x{count} {sql}')
+
+        if failures:
+            raise CommandError(f'{failures} endpoint(s) over their query budget')
@@ -0,0 +1,42 @@
+"""
+Backfill FBSAuditLog.search_document for rows written before audit search.
+
+    python manage.py rebuild_audit_search [--batch-size 1000] [--all]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.models import FBSAuditLog
+from apps.core.utils.audit_search import build_search_document
+
+
+class Command(BaseCommand):
+    help = 'Populate the audit log search document used by the search indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild every row, not only rows with an empty document')
+
+    def handle(self, *args, **options):
+        queryset = FBSAuditLog.objects.using(options['database']).select_related('user').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(search_document='')
+
+        updated = 0
+        batch = []
+        for log in queryset.iterator(chunk_size=options['batch_size']):
+            log.search_document = build_search_document(
+                log.resource_id, log.user.username if log.user else '', log.details,
+            )
+            batch.append(log)
+            if len(batch) >= options['batch_size']:
+                FBSAuditLog.objects.using(options['database']).bulk_update(batch, ['search_document'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            FBSAuditLog.objects.using(options['database']).bulk_update(batch, ['search_document'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search document for {updated} audit rows'))
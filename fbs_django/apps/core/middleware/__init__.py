@@ -1,2 +1,27 @@
 # FBS Core Middleware Package
+from .database_router import (
+    DatabaseRouterMiddleware,
+    FBSDatabaseRouter,
+    get_current_solution,
+    set_current_solution,
+    reset_current_solution,
+    clear_current_solution,
+    solution_context,
+)
+from .audit_batch import AuditBatchMiddleware
+from .query_metrics import QueryMetricsMiddleware
+from .request_logging import RequestLoggingMiddleware, PerformanceMonitoringMiddleware
 
+__all__ = [
+    'DatabaseRouterMiddleware',
+    'FBSDatabaseRouter',
+    'get_current_solution',
+    'set_current_solution',
+    'reset_current_solution',
+    'clear_current_solution',
+    'solution_context',
+    'AuditBatchMiddleware',
+    'RequestLoggingMiddleware',
+    'PerformanceMonitoringMiddleware',
+    'QueryMetricsMiddleware',
+]
@@ -0,0 +1,37 @@
+"""
+FBS Audit Batch Middleware
+
+Collects the audit events logged while handling a request and hands them to
+the audit writer in one batch when the response is ready.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from ..utils.audit import audit_batch
+
+
+class AuditBatchMiddleware:
+    """
+    Coalesce a request's audit events into a single batched insert.
+
+    Events logged while a streaming response is being consumed are written
+    individually, as they happen after the middleware has returned.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with audit_batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with audit_batch():
+            return await self.get_response(request)
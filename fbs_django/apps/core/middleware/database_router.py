@@ -4,14 +4,66 @@ FBS Database Router Middleware
 Handles multi-tenant database routing for FBS solutions.
 Routes database operations to the appropriate solution database.
 """
-import threading
-from django.db import connections
+import contextvars
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
-from typing import Optional
+from django.core.exceptions import PermissionDenied
+from typing import Dict, Iterable, Optional, Tuple
+from ..utils.solutions import active_solutions
+from ..utils.tenant_connections import tenant_connections, get_solution_alias
 
 
-# Thread-local storage for current solution context
-_local = threading.local()
+# Context-local storage for current solution context.
+# A ContextVar follows the request through threads and asyncio tasks alike,
+# so concurrent ASGI requests on one event loop never see each other's tenant.
+_current_solution: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    'fbs_current_solution', default=None
+)
+
+# Routing categories
+ROUTE_SYSTEM = 'system'      # Always on the default database (solutions, settings)
+ROUTE_SOLUTION = 'solution'  # Solution-scoped, routed to djo_{solution}_db
+ROUTE_SHARED = 'shared'      # Everything else, default database
+
+# Model class -> routing category, built once in CoreConfig.ready()
+_routing_table: Dict[type, str] = {}
+
+
+def classify_model(model) -> str:
+    """Work out the routing category for a model class"""
+    from apps.core.models import FBSSolution, FBSSystemSettings
+
+    if model in (FBSSolution, FBSSystemSettings):
+        return ROUTE_SYSTEM
+    # Models with a 'solution' field are solution-scoped
+    if hasattr(model, 'solution'):
+        return ROUTE_SOLUTION
+    return ROUTE_SHARED
+
+
+def build_routing_table(models: Optional[Iterable[type]] = None) -> Dict[type, str]:
+    """
+    Precompute routing categories for every installed model.
+
+    Called from ``CoreConfig.ready()`` so routing a query costs a single
+    dict lookup. Models not in the table (e.g. created dynamically after
+    startup) are classified on first use and added.
+    """
+    if models is None:
+        from django.apps import apps
+        models = apps.get_models(include_auto_created=True)
+
+    _routing_table.update({model: classify_model(model) for model in models})
+    return _routing_table
+
+
+def get_model_route(model) -> str:
+    """Get the routing category for a model class"""
+    route = _routing_table.get(model)
+    if route is None:
+        route = _routing_table[model] = classify_model(model)
+    return route
 
 
 class FBSDatabaseRouter:
@@ -23,29 +75,33 @@ class FBSDatabaseRouter:
 
     def db_for_read(self, model, **hints):
         """Route read operations to the appropriate database"""
-        solution_name = self._get_current_solution()
-        if solution_name and self._is_solution_model(model):
-            return f'djo_{solution_name}_db'
+        solution_name = _current_solution.get()
+        if solution_name and get_model_route(model) == ROUTE_SOLUTION:
+            return tenant_connections.acquire(solution_name)
         return 'default'
 
     def db_for_write(self, model, **hints):
         """Route write operations to the appropriate database"""
-        solution_name = self._get_current_solution()
-        if solution_name and self._is_solution_model(model):
-            return f'djo_{solution_name}_db'
+        solution_name = _current_solution.get()
+        if solution_name and get_model_route(model) == ROUTE_SOLUTION:
+            return tenant_connections.acquire(solution_name)
         return 'default'
 
     def allow_relation(self, obj1, obj2, **hints):
         """Allow relations between objects in the same solution"""
-        solution1 = getattr(obj1, 'solution', None)
-        solution2 = getattr(obj2, 'solution', None)
+        # Read the FK ids from the instance dict: this runs while model
+        # __init__ is still assigning fields, and a plain attribute access
+        # on an unset (deferred) field would call refresh_from_db()
+        solution1 = obj1.__dict__.get('solution_id')
+        solution2 = obj2.__dict__.get('solution_id')
 
         # If both objects belong to the same solution, allow the relation
         if solution1 and solution2 and solution1 == solution2:
             return True
 
         # Allow relations between system models and solution models
-        if self._is_system_model(obj1.__class__) or self._is_system_model(obj2.__class__):
+        if (get_model_route(obj1.__class__) == ROUTE_SYSTEM
+                or get_model_route(obj2.__class__) == ROUTE_SYSTEM):
             return True
 
         return None
@@ -67,97 +123,253 @@ class FBSDatabaseRouter:
 
     def _is_solution_model(self, model) -> bool:
         """Check if a model belongs to a solution database"""
-        # Models with a 'solution' field are solution-scoped
-        return hasattr(model, 'solution')
+        return get_model_route(model) == ROUTE_SOLUTION
 
     def _is_system_model(self, model_class) -> bool:
         """Check if a model is a system-level model"""
-        from apps.core.models import FBSSolution, FBSSystemSettings
-        return model_class in [FBSSolution, FBSSystemSettings]
+        return get_model_route(model_class) == ROUTE_SYSTEM
 
     def _get_current_solution(self) -> Optional[str]:
-        """Get the current solution name from thread-local storage"""
-        return getattr(_local, 'solution_name', None)
+        """Get the current solution name from the active context"""
+        return _current_solution.get()
 
 
 class DatabaseRouterMiddleware:
     """
     Middleware to set database routing context based on request.
 
-    Sets the current solution context for database routing.
+    Sets the current solution context for database routing. Works under
+    both WSGI and ASGI; in async mode the context is scoped to the request's
+    task, so one event loop can serve many tenants concurrently.
+
+    The solution is resolved by a pipeline of cheap request sources, tried in
+    order (``FBS_CONFIG['SOLUTION_RESOLVERS']``). Candidate names are checked
+    against the in-process active solution cache, so resolving a tenant needs
+    no database query and no request body parsing. The ``url_kwarg`` source
+    is read from the resolved view kwargs in ``process_view``.
+
+    Every source except ``attribute`` is client controlled, so a candidate
+    from one of them must match the solution of the authenticated user;
+    superusers (service principals) may address any solution and a mismatch
+    is rejected with 403. Anonymous requests are routed as asked and left to
+    the view's permission checks. The caller is only authenticated here when
+    a client-supplied source matched; requests naming no solution run
+    without a solution context and cost no authentication.
     """
 
+    sync_capable = True
+    async_capable = True
+
+    DEFAULT_RESOLVERS = ('attribute', 'header', 'subdomain', 'url_kwarg', 'query_param')
+    # Sources set by server code rather than the client
+    TRUSTED_RESOLVERS = frozenset({'attribute'})
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+        fbs_config = getattr(settings, 'FBS_CONFIG', {})
+        self.base_domain = fbs_config.get('SOLUTION_BASE_DOMAIN', '').lower().strip('.')
+        names = list(fbs_config.get('SOLUTION_RESOLVERS', self.DEFAULT_RESOLVERS))
+        # URL kwargs are only known once the URL is resolved (process_view)
+        self.url_kwarg_position = names.index('url_kwarg') if 'url_kwarg' in names else None
+        self.unresolved_position = len(names)
+        self.resolvers = [
+            (position, name, getattr(self, f'_resolve_from_{name}'))
+            for position, name in enumerate(names)
+            if name != 'url_kwarg'
+        ]
+
+        from ..authentication.token_auth import FBSTokenAuthentication
+        self.token_authentication = FBSTokenAuthentication()
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Extract solution from request
         solution_name = self._get_solution_from_request(request)
 
-        # Set solution context
-        if solution_name:
-            _local.solution_name = solution_name
+        # Set solution context for the duration of the request
+        token = _current_solution.set(solution_name)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_solution.reset(token)
+
+    async def __acall__(self, request):
+        """Async variant used when the middleware chain runs under ASGI"""
+        # Checking the caller may load the user; keep it off the event loop
+        solution_name = await sync_to_async(self._get_solution_from_request)(request)
+
+        token = _current_solution.set(solution_name)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_solution.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Apply a ``solution_name`` URL kwarg unless an earlier source already decided"""
+        if self.url_kwarg_position is None:
+            return None
+
+        solution_name = view_kwargs.get('solution_name')
+        position = getattr(request, '_fbs_solution_position', self.unresolved_position)
+        if not solution_name or position < self.url_kwarg_position:
+            return None
+        if not active_solutions.is_active(solution_name):
+            return None
+
+        self._bind(request, solution_name, 'url_kwarg', self.url_kwarg_position)
+        # Restored by the reset in __call__/__acall__
+        _current_solution.set(solution_name)
+        return None
 
-        response = self.get_response(request)
+    def _get_solution_from_request(self, request) -> Optional[str]:
+        """Resolve the solution name from the first source that yields an active solution"""
+        for position, source, resolver in self.resolvers:
+            solution_name = resolver(request)
+            if solution_name and active_solutions.is_active(solution_name):
+                return self._bind(request, solution_name, source, position)
 
-        # Clean up solution context
-        if hasattr(_local, 'solution_name'):
-            delattr(_local, 'solution_name')
+        # Nothing to check the caller against: leave authentication to DRF
+        return None
 
-        return response
+    def _bind(self, request, solution_name: str, source: str, position: int) -> str:
+        """Check a candidate against the caller and expose it on the request"""
+        if source not in self.TRUSTED_RESOLVERS:
+            principal = self._get_principal(request, solution_name)
+            if principal is not None:
+                principal_solution, is_service = principal
+                if not is_service and principal_solution != solution_name:
+                    raise PermissionDenied("Requested solution does not match the authenticated user")
+
+        # Expose the resolved tenant to downstream middleware and views
+        request.solution_name = solution_name
+        request._fbs_solution_position = position
+        return solution_name
+
+    def _get_principal(self, request, solution_name: str) -> Optional[Tuple[Optional[str], bool]]:
+        """
+        ``(solution_name, is_service)`` of the authenticated caller, or None.
+
+        Authentication runs in the candidate solution's context, as the view
+        would run it; token authentication memoises its outcome on the
+        request, so DRF does not repeat it.
+        """
+        principal = getattr(request, '_fbs_principal', False)
+        if principal is not False:
+            return principal
+
+        from rest_framework.exceptions import AuthenticationFailed
+
+        user = None
+        with solution_context(solution_name):
+            try:
+                result = self.token_authentication.authenticate(request)
+            except AuthenticationFailed:
+                # Treated as anonymous here; DRF rejects the request later
+                result = None
+            if result is not None:
+                user = result[0]
+            else:
+                session_user = getattr(request, 'user', None)
+                if session_user is not None and session_user.is_authenticated:
+                    user = session_user
+
+            if user is None:
+                principal = None
+            else:
+                solution = getattr(user, 'solution', None)
+                principal = (solution.name if solution is not None else None,
+                             bool(getattr(user, 'is_superuser', False)))
+
+        request._fbs_principal = principal
+        return principal
+
+    def _resolve_from_attribute(self, request) -> Optional[str]:
+        """Solution explicitly attached to the request by an outer layer"""
+        return getattr(request, 'solution_name', None)
+
+    def _resolve_from_header(self, request) -> Optional[str]:
+        """``X-Solution-Name`` request header"""
+        return request.META.get('HTTP_X_SOLUTION_NAME')
+
+    def _resolve_from_subdomain(self, request) -> Optional[str]:
+        """Leftmost label of ``{solution}.{SOLUTION_BASE_DOMAIN}``"""
+        if not self.base_domain:
+            return None
+
+        host = request.META.get('HTTP_HOST', '').split(':', 1)[0].lower()
+        suffix = f'.{self.base_domain}'
+        if host.endswith(suffix):
+            subdomain = host[:-len(suffix)]
+            if subdomain and '.' not in subdomain:
+                return subdomain
+        return None
 
-    def _get_solution_from_request(self, request) -> Optional[str]:
-        """Extract solution name from various request sources"""
-
-        # Check URL parameters
-        solution_name = getattr(request, 'solution_name', None)
-        if solution_name:
-            return solution_name
-
-        # Check authenticated user
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            if hasattr(request.user, 'solution'):
-                return request.user.solution.name
-
-        # Check headers
-        solution_header = request.META.get('HTTP_X_SOLUTION_NAME')
-        if solution_header:
-            return solution_header
-
-        # Check session
-        if hasattr(request, 'session'):
-            solution_name = request.session.get('current_solution')
-            if solution_name:
-                return solution_name
-
-        # Check query parameters
-        solution_param = request.GET.get('solution') or request.POST.get('solution')
-        if solution_param:
-            return solution_param
+    def _resolve_from_query_param(self, request) -> Optional[str]:
+        """``?solution=`` query parameter (never the request body)"""
+        return request.GET.get('solution')
 
-        return None
+    def _resolve_from_session(self, request) -> Optional[str]:
+        """
+        Session value, opt-in only.
+
+        Reading the session costs a query with database-backed sessions, so
+        it is not part of the default pipeline.
+        """
+        session = getattr(request, 'session', None)
+        return session.get('current_solution') if session is not None else None
 
 
 # Utility functions for solution context management
-def set_current_solution(solution_name: str):
-    """Set the current solution context"""
-    _local.solution_name = solution_name
+def set_current_solution(solution_name: str) -> contextvars.Token:
+    """
+    Set the current solution context.
+
+    Returns a token that can be passed to ``reset_current_solution`` to
+    restore the previous context.
+    """
+    return _current_solution.set(solution_name)
 
 
 def get_current_solution() -> Optional[str]:
     """Get the current solution context"""
-    return getattr(_local, 'solution_name', None)
+    return _current_solution.get()
+
+
+def reset_current_solution(token: contextvars.Token):
+    """Restore the solution context that was active before ``set_current_solution``"""
+    _current_solution.reset(token)
 
 
 def clear_current_solution():
     """Clear the current solution context"""
-    if hasattr(_local, 'solution_name'):
-        delattr(_local, 'solution_name')
+    _current_solution.set(None)
+
+
+@contextmanager
+def solution_context(solution_name: Optional[str]):
+    """
+    Run a block of code against a solution database.
+
+    Safe to use from sync code, Celery tasks and ``async def`` services:
+
+        with solution_context('acme'):
+            ...
+    """
+    token = _current_solution.set(solution_name)
+    try:
+        yield solution_name
+    finally:
+        _current_solution.reset(token)
 
 
 def get_solution_database_name(solution_name: str) -> str:
     """Get the database name for a solution"""
-    return f'djo_{solution_name}_db'
+    return get_solution_alias(solution_name)
 
 
 def ensure_solution_database(solution_name: str):
@@ -165,22 +377,8 @@ def ensure_solution_database(solution_name: str):
     Ensure a solution database exists and is configured.
 
     This would typically be called during solution creation/setup.
+    Registration goes through the tenant connection registry so the alias
+    shares its pooling and recycling policy.
     """
-    from django.db import connections
-
-    db_name = get_solution_database_name(solution_name)
-
-    # Check if database connection is configured
-    if db_name not in connections.databases:
-        # Configure the database connection dynamically
-        base_config = settings.DATABASES['default'].copy()
-
-        # Modify database name for solution
-        if 'NAME' in base_config:
-            base_config['NAME'] = f'djo_{solution_name}_db'
-
-        # Register the new database connection
-        connections.databases[db_name] = base_config
-
-    return db_name
+    return tenant_connections.register(solution_name)
 
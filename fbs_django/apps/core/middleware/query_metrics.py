@@ -0,0 +1,75 @@
+"""
+FBS Query Metrics Middleware
+
+Counts the SQL each request runs on every database alias (default and
+tenant databases), the duplicated statements among them and the total time
+spent in the database.
+
+The numbers are attached to the request for ``RequestLoggingMiddleware``,
+returned in a ``Server-Timing`` header and logged when a request goes over
+``FBS_CONFIG['QUERY_METRICS']['BUDGET']`` queries.
+"""
+import logging
+
+from django.conf import settings
+
+from ..utils.query_budget import QueryCounter
+
+
+logger = logging.getLogger('fbs.performance')
+
+DEFAULT_QUERY_BUDGET = 50
+
+
+class QueryMetricsMiddleware:
+    """
+    Per-request query count, duplicate queries and database time.
+
+    Sync only: ``execute_wrapper`` hooks the connections of the current
+    thread, which under ASGI is the thread sync views and ORM calls run in.
+    Queries made while a streaming response is consumed are not counted.
+    """
+
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'FBS_CONFIG', {}).get('QUERY_METRICS', {})
+        self.budget = config.get('BUDGET', DEFAULT_QUERY_BUDGET)
+        self.server_timing = config.get('SERVER_TIMING', True)
+
+    def __call__(self, request):
+        # Every alias known now, including the preloaded tenant aliases
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        duplicates = counter.duplicates()
+        stats = {
+            'queries': counter.count,
+            'duplicate_queries': sum(count - 1 for count in duplicates.values()),
+            'db_time_ms': round(counter.total_time * 1000, 2),
+            'query_budget_exceeded': counter.count > self.budget,
+        }
+        request.fbs_query_stats = stats
+
+        if self.server_timing:
+            timing = f'db;dur={stats["db_time_ms"]};desc="{counter.count} queries"'
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        if stats['query_budget_exceeded']:
+            worst = sorted(duplicates.items(), key=lambda item: item[1], reverse=True)[:5]
+            logger.warning(
+                "QUERY_BUDGET %s %s ran %d queries (budget %d, %d duplicates)",
+                request.method, request.path, counter.count, self.budget, stats['duplicate_queries'],
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'solution': getattr(request, 'solution_name', None),
+                    **stats,
+                    'top_duplicates': [{'sql': sql[:500], 'count': count} for sql, count in worst],
+                }
+            )
+
+        return response
@@ -2,56 +2,83 @@
 FBS Request Logging Middleware
 
 Comprehensive request logging for audit and monitoring purposes.
+
+Records go through the queue-backed pipeline in ``apps.core.utils.request_log``:
+the request thread only samples, builds a small dict and enqueues it; JSON
+encoding and I/O happen on the listener thread.
 """
+import hmac
 import logging
+import random
 import time
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+
+from ..utils.metrics import request_metrics
+from ..utils.profiler import get_profiling_config, request_profiler, write_profile
+from ..utils.request_log import REQUEST_LOGGER, setup_request_logging
 
 
-logger = logging.getLogger('fbs.requests')
+logger = logging.getLogger(REQUEST_LOGGER)
+
+# Fraction of requests logged per status class; errors are always logged
+DEFAULT_SAMPLE_RATES = {'1xx': 0.0, '2xx': 1.0, '3xx': 1.0, '4xx': 1.0, '5xx': 1.0}
 
 
 class RequestLoggingMiddleware:
     """
     Middleware for comprehensive request logging.
 
-    Logs all requests with timing, user info, and response details
-    for audit and monitoring purposes.
+    Logs requests with timing, user info, and response details for audit
+    and monitoring purposes, sampled per status class
+    (``FBS_CONFIG['REQUEST_LOGGING']['SAMPLE_RATES']``). Response size comes
+    from ``Content-Length``; streaming bodies are never read.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
-        # Start timing
-        start_time = time.time()
+        config = getattr(settings, 'FBS_CONFIG', {}).get('REQUEST_LOGGING', {})
+        rates = {**DEFAULT_SAMPLE_RATES, **config.get('SAMPLE_RATES', {})}
+        # Indexed by status // 100 to keep the per-request lookup trivial
+        self.sample_rates = [1.0] + [rates.get(f'{digit}xx', 1.0) for digit in range(1, 6)]
+        setup_request_logging()
 
-        # Extract request information
-        request_info = self._extract_request_info(request)
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
+        start_time = time.perf_counter()
         try:
-            # Process the request
             response = self.get_response(request)
+        except Exception as e:
+            self._log_error(request, e, time.perf_counter() - start_time)
+            raise
 
-            # Calculate duration
-            duration = time.time() - start_time
-
-            # Log successful request
-            self._log_request(request_info, response, duration)
-
-            return response
+        self._log_request(request, response, time.perf_counter() - start_time)
+        return response
 
+    async def __acall__(self, request):
+        start_time = time.perf_counter()
+        try:
+            response = await self.get_response(request)
         except Exception as e:
-            # Calculate duration for failed requests
-            duration = time.time() - start_time
+            self._log_error(request, e, time.perf_counter() - start_time)
+            raise
 
-            # Log failed request
-            self._log_error(request_info, e, duration)
+        self._log_request(request, response, time.perf_counter() - start_time)
+        return response
 
-            # Re-raise the exception
-            raise
+    def _should_log(self, status_code: int) -> bool:
+        rate = self.sample_rates[min(status_code // 100, 5)]
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
 
     def _extract_request_info(self, request) -> Dict[str, Any]:
         """Extract relevant information from the request"""
@@ -59,27 +86,26 @@ class RequestLoggingMiddleware:
             'method': request.method,
             'path': request.path,
             'query_string': request.META.get('QUERY_STRING', ''),
-            'content_type': request.META.get('CONTENT_TYPE', ''),
-            'content_length': request.META.get('CONTENT_LENGTH', 0),
+            'content_length': request.META.get('CONTENT_LENGTH') or 0,
             'user_agent': request.META.get('HTTP_USER_AGENT', ''),
             'remote_addr': self._get_client_ip(request),
-            'referer': request.META.get('HTTP_REFERER', ''),
+            'solution_name': getattr(request, 'solution_name', None),
         }
 
-        # Add user information if authenticated
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            info['user_id'] = request.user.id
-            info['username'] = request.user.username
-            if hasattr(request.user, 'solution'):
-                info['solution_name'] = request.user.solution.name
+        # Only report a user that authentication already resolved; never
+        # trigger a session or token lookup just to log it
+        user = getattr(request, 'user', None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            user = None
+        if user is not None and user.is_authenticated:
+            info['user_id'] = user.pk
+            info['username'] = user.username
+            if not info['solution_name'] and getattr(user, 'solution_id', None):
+                info['solution_id'] = user.solution_id
         else:
             info['user_id'] = None
             info['username'] = 'anonymous'
 
-        # Add solution context if available
-        if hasattr(request, 'solution'):
-            info['solution_name'] = request.solution.name
-
         return info
 
     def _get_client_ip(self, request) -> str:
@@ -93,66 +119,178 @@ class RequestLoggingMiddleware:
 
         return ip
 
-    def _log_request(self, request_info: Dict[str, Any], response, duration: float):
-        """Log a successful request"""
+    @staticmethod
+    def _get_response_length(response) -> Optional[int]:
+        """Body size without touching streaming content"""
+        length = response.get('Content-Length')
+        if length is not None:
+            return int(length)
+        if getattr(response, 'streaming', False):
+            return None
+        # Regular responses already hold their body in memory
+        return len(response.content)
+
+    def _log_request(self, request, response, duration: float):
+        """Log a completed request"""
+        status_code = response.status_code
+        if not self._should_log(status_code):
+            return
+
         log_data = {
-            **request_info,
-            'status_code': response.status_code,
+            **self._extract_request_info(request),
+            'status_code': status_code,
             'duration_ms': round(duration * 1000, 2),
-            'response_content_type': getattr(response, 'get', lambda x: '')('Content-Type'),
-            'response_content_length': len(getattr(response, 'content', b'')),
+            'response_content_type': response.get('Content-Type', ''),
+            'response_content_length': self._get_response_length(response),
         }
+        # Set by QueryMetricsMiddleware when installed
+        query_stats = getattr(request, 'fbs_query_stats', None)
+        if query_stats:
+            log_data.update(query_stats)
 
         # Choose log level based on status code
-        if 200 <= response.status_code < 400:
-            logger.info(f"REQUEST {request_info['method']} {request_info['path']}", extra=log_data)
-        elif 400 <= response.status_code < 500:
-            logger.warning(f"CLIENT_ERROR {request_info['method']} {request_info['path']}", extra=log_data)
+        if status_code < 400:
+            logger.info("REQUEST %s %s", request.method, request.path, extra=log_data)
+        elif status_code < 500:
+            logger.warning("CLIENT_ERROR %s %s", request.method, request.path, extra=log_data)
         else:
-            logger.error(f"SERVER_ERROR {request_info['method']} {request_info['path']}", extra=log_data)
+            logger.error("SERVER_ERROR %s %s", request.method, request.path, extra=log_data)
 
-    def _log_error(self, request_info: Dict[str, Any], error: Exception, duration: float):
+    def _log_error(self, request, error: Exception, duration: float):
         """Log a failed request"""
         log_data = {
-            **request_info,
+            **self._extract_request_info(request),
             'duration_ms': round(duration * 1000, 2),
             'error_type': type(error).__name__,
             'error_message': str(error),
         }
 
-        logger.error(f"REQUEST_ERROR {request_info['method']} {request_info['path']}", extra=log_data)
+        logger.error("REQUEST_ERROR %s %s", request.method, request.path, extra=log_data)
 
 
 class PerformanceMonitoringMiddleware:
     """
     Middleware for monitoring request performance.
 
-    Tracks slow requests and generates performance metrics.
+    Records every request's latency in the in-process histograms of
+    ``apps.core.utils.metrics`` (keyed by URL route name, method and
+    solution; exported at ``/metrics``) and logs requests slower than
+    ``SLOW_REQUEST_THRESHOLD`` milliseconds.
+
+    With ``FBS_CONFIG['PROFILING']['ENABLED']``, selected sync requests are
+    run under the sampling profiler (``apps.core.utils.profiler``). A request
+    is profiled when it carries ``X-FBS-Profile: <PROFILING['HEADER_TOKEN']>``,
+    when its solution is listed in the ``profiling.solutions`` system
+    setting, or at random with probability ``PROFILING['SAMPLE_RATE']``.
+    Header-requested profiles are always stored; the others only when the
+    request took at least ``PROFILING['MIN_DURATION_MS']``.
     """
 
+    sync_capable = True
+    async_capable = True
+
+    PROFILE_HEADER = 'HTTP_X_FBS_PROFILE'
+    PROFILE_SETTING = 'profiling.solutions'
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
         self.slow_request_threshold = getattr(settings, 'FBS_CONFIG', {}).get('SLOW_REQUEST_THRESHOLD', 1000)  # ms
 
+        profiling = get_profiling_config()
+        self.profiling_enabled = profiling.get('ENABLED', False) and request_profiler.install()
+        self.profile_header_token = profiling.get('HEADER_TOKEN', '')
+        self.profile_sample_rate = profiling.get('SAMPLE_RATE', 0.0)
+        self.profile_min_duration = profiling.get('MIN_DURATION_MS', self.slow_request_threshold)
+
     def __call__(self, request):
-        start_time = time.time()
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile_reason = self._get_profile_reason(request) if self.profiling_enabled else None
+        if profile_reason and request_profiler.start():
+            return self._call_profiled(request, profile_reason)
 
-        response = self.get_response(request)
+        start_time = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self._record(request, time.perf_counter() - start_time)
 
-        duration_ms = (time.time() - start_time) * 1000
+    def _call_profiled(self, request, reason: str):
+        start_time = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = request_profiler.stop()
+            duration = time.perf_counter() - start_time
+            self._record(request, duration)
+
+        duration_ms = duration * 1000
+        if reason == 'header' or duration_ms >= self.profile_min_duration:
+            label = f"{request.method}-{self._get_route(request)}-{getattr(request, 'solution_name', None) or '-'}-{duration_ms:.0f}ms"
+            try:
+                name = write_profile(samples, label)
+            except OSError:
+                logger.exception("Could not write request profile")
+                name = None
+            if name:
+                response['X-FBS-Profile'] = name
+                logger.info("PROFILE %s %s stored as %s (%s)", request.method, request.path, name, reason)
+        return response
 
+    def _get_profile_reason(self, request) -> Optional[str]:
+        """Why this request should be profiled, or None"""
+        if self.profile_header_token:
+            supplied = request.META.get(self.PROFILE_HEADER)
+            if supplied and hmac.compare_digest(supplied.encode(), self.profile_header_token.encode()):
+                return 'header'
+
+        solution_name = getattr(request, 'solution_name', None)
+        if solution_name:
+            from ..utils.settings import get_system_setting
+            if solution_name in (get_system_setting(self.PROFILE_SETTING) or ()):
+                return 'solution'
+
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate:
+            return 'sampled'
+        return None
+
+    async def __acall__(self, request):
+        start_time = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._record(request, time.perf_counter() - start_time)
+
+    @staticmethod
+    def _get_route(request) -> str:
+        """Low-cardinality route label: URL name, else pattern"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match.route or 'unnamed'
+
+    def _record(self, request, duration: float):
+        route = self._get_route(request)
+        solution = getattr(request, 'solution_name', None) or '-'
+        request_metrics.record(route, request.method, solution, duration)
+
+        duration_ms = duration * 1000
         # Log slow requests
         if duration_ms > self.slow_request_threshold:
+            user = getattr(request, 'user', None)
+            if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+                user = None
             logger.warning(
-                f"SLOW_REQUEST {request.method} {request.path} took {duration_ms:.2f}ms",
+                "SLOW_REQUEST %s %s took %.2fms", request.method, request.path, duration_ms,
                 extra={
                     'method': request.method,
                     'path': request.path,
-                    'duration_ms': duration_ms,
-                    'user': getattr(request.user, 'username', 'anonymous') if hasattr(request, 'user') else 'anonymous',
-                    'solution': getattr(request, 'solution', {}).get('name', 'unknown') if hasattr(request, 'solution') else 'unknown',
+                    'route': route,
+                    'duration_ms': round(duration_ms, 2),
+                    'user': getattr(user, 'username', None) or 'anonymous',
+                    'solution': solution,
                 }
             )
-
-        return response
-
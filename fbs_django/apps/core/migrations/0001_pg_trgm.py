@@ -0,0 +1,15 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Install ``pg_trgm`` before any model table is created: the audit log's
+    ``fbs_audit_search_trgm_idx`` uses its ``gin_trgm_ops`` operator class.
+    """
+
+    dependencies = []
+
+    operations = [
+        TrigramExtension(),
+    ]
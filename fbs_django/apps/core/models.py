@@ -3,13 +3,99 @@ Core FBS Django models
 
 Multi-tenant architecture with FBS-specific user model and solution management.
 """
+import copy
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+
+
+class TrackedFieldsMixin(models.Model):
+    """
+    Snapshot field values when an instance is loaded from the database.
+
+    ``get_changed_fields()`` then reports what a pending save will change
+    without re-reading the row. Instances that were never loaded (e.g.
+    built by hand with a primary key) have no snapshot and report
+    ``None``, meaning "unknown".
+    """
+
+    # Attribute names to track; empty means every concrete field
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_snapshot = {}
+        instance._snapshot_fields()
+        return instance
+
+    @classmethod
+    def _get_tracked_attnames(cls):
+        if cls.tracked_fields:
+            return [cls._meta.get_field(name).attname for name in cls.tracked_fields]
+        return [field.attname for field in cls._meta.concrete_fields
+                if not getattr(field, 'auto_now', False)]
+
+    def _snapshot_fields(self, attnames=None):
+        snapshot = self.__dict__.setdefault('_tracked_snapshot', {})
+        for attname in attnames or self._get_tracked_attnames():
+            # Deferred fields are snapshotted when they are loaded
+            if attname in self.__dict__:
+                value = self.__dict__[attname]
+                if isinstance(value, (dict, list)):
+                    value = copy.deepcopy(value)
+                snapshot[attname] = value
+
+    def get_changed_fields(self):
+        """
+        Get ``{field_name: (old, new)}`` for fields changed since load.
+
+        Returns ``None`` when the instance was not loaded from the database.
+        """
+        snapshot = self.__dict__.get('_tracked_snapshot')
+        if snapshot is None:
+            return None
+
+        changes = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in snapshot or field.attname not in self.__dict__:
+                continue
+            old, new = snapshot[field.attname], self.__dict__[field.attname]
+            if old != new:
+                changes[field.name] = (old, new)
+        return changes
+
+    def has_changed(self, field_name):
+        """Check a single field; unknown state counts as changed"""
+        changes = self.get_changed_fields()
+        return changes is None or field_name in changes
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have seen the diff; the saved values are the new baseline
+        update_fields = kwargs.get('update_fields', args[3] if len(args) > 3 else None)
+        if update_fields is not None:
+            self._snapshot_fields([self._meta.get_field(name).attname for name in update_fields])
+        else:
+            self._snapshot_fields()
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._snapshot_fields()
+        else:
+            self._snapshot_fields([self._meta.get_field(name).attname for name in fields])
 
 
-class FBSSolution(models.Model):
+class FBSSolution(TrackedFieldsMixin, models.Model):
     """Multi-tenant solution configuration"""
 
     name = models.CharField(max_length=100, unique=True, help_text="Unique solution identifier")
@@ -20,6 +106,11 @@ class FBSSolution(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True, help_text="Whether this solution is active")
+    audit_retention_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Days to keep audit logs for this solution (defaults to the system policy)"
+    )
 
     class Meta:
         db_table = 'fbs_solutions'
@@ -40,7 +131,7 @@ class FBSSolution(models.Model):
             raise ValidationError("Solution name cannot contain spaces")
 
 
-class FBSUser(AbstractUser):
+class FBSUser(TrackedFieldsMixin, AbstractUser):
     """Extended user model for FBS with multi-tenant support"""
 
     solution = models.ForeignKey(
@@ -163,6 +254,11 @@ class FBSAuditLog(models.Model):
         blank=True,
         help_text="User agent string"
     )
+    search_document = models.TextField(
+        blank=True,
+        default='',
+        help_text="Resource id, username and flattened details, indexed for search"
+    )
 
     # Timestamps
     timestamp = models.DateTimeField(
@@ -179,6 +275,11 @@ class FBSAuditLog(models.Model):
             models.Index(fields=['resource_type', 'resource_id']),
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['action', 'timestamp']),
+            # Search indexes (see apps.core.utils.audit_search)
+            GinIndex(SearchVector('search_document', config='simple'), name='fbs_audit_search_fts_idx'),
+            # On UPPER() to match what icontains compiles to on PostgreSQL
+            GinIndex(OpClass(Upper('search_document'), name='gin_trgm_ops'), name='fbs_audit_search_trgm_idx'),
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='fbs_audit_details_path_idx'),
         ]
 
     def __str__(self):
@@ -201,7 +302,12 @@ class FBSAPIToken(models.Model):
     token = models.CharField(
         max_length=256,
         unique=True,
-        help_text="The actual token string"
+        help_text="SHA-256 hash of the token string"
+    )
+    token_prefix = models.CharField(
+        max_length=12,
+        blank=True,
+        help_text="Leading characters of the plain token, used for lookup"
     )
 
     # Permissions and scope
@@ -228,6 +334,10 @@ class FBSAPIToken(models.Model):
         blank=True,
         help_text="Last time this token was used"
     )
+    usage_count = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Number of requests authenticated with this token"
+    )
     created_by_ip = models.GenericIPAddressField(
         null=True,
         blank=True,
@@ -240,6 +350,7 @@ class FBSAPIToken(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['token']),
+            models.Index(fields=['token_prefix', 'is_active']),
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['expires_at']),
         ]
@@ -258,7 +369,7 @@ class FBSAPIToken(models.Model):
         return scope in self.scopes or 'all' in self.scopes
 
 
-class FBSSystemSettings(models.Model):
+class FBSSystemSettings(TrackedFieldsMixin, models.Model):
     """Global system settings for FBS"""
 
     SETTING_TYPES = [
@@ -308,13 +419,11 @@ class FBSSystemSettings(models.Model):
         return f"{self.key}: {self.value[:50]}..."
 
     def get_typed_value(self):
-        """Get the value cast to the appropriate type"""
-        if self.setting_type == 'integer':
-            return int(self.value)
-        elif self.setting_type == 'boolean':
-            return self.value.lower() in ('true', '1', 'yes', 'on')
-        elif self.setting_type == 'json':
-            import json
-            return json.loads(self.value)
-        else:
-            return self.value
\ No newline at end of file
+        """
+        Get the value cast to the appropriate type.
+
+        Hot paths should read ``apps.core.utils.settings.get_system_setting``
+        instead, which serves pre-parsed values without a query.
+        """
+        from .utils.settings import parse_setting_value
+        return parse_setting_value(self.setting_type, self.value)
\ No newline at end of file
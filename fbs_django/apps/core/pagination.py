@@ -0,0 +1,158 @@
+"""
+FBS Core Pagination
+
+Pagination classes for core API endpoints.
+
+``FBSCursorPagination`` pages with opaque cursors on the view's ``ordering``.
+DRF's cursor filters on the leading ordering field (``WHERE field < position``)
+and only uses an ``OFFSET`` to step over rows sharing that field's value, so
+page 500 costs about the same as page one. The reported ``count`` is exact
+for result sets up to ``COUNT_ESTIMATE_THRESHOLD`` rows, at one query; above
+it the planner's estimate is used and the response carries
+``count_is_estimate: true``. Select it per ViewSet with ``pagination_class``.
+"""
+import json
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+DEFAULT_COUNT_ESTIMATE_THRESHOLD = 10000
+
+
+def _get_config():
+    return getattr(settings, 'FBS_CONFIG', {}).get('PAGINATION', {})
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    Planner estimate of ``queryset.count()``, or ``None`` off PostgreSQL.
+
+    Unfiltered querysets read ``pg_class.reltuples`` (summed over partitions);
+    filtered ones use the row estimate of ``EXPLAIN``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                table = queryset.model._meta.db_table
+                cursor.execute(
+                    "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0) FROM pg_class c "
+                    "WHERE c.oid = %s::regclass "
+                    "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                    [table, table],
+                )
+                return int(cursor.fetchone()[0])
+
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+    except DatabaseError:
+        return None
+
+
+def count_with_estimate(queryset, threshold: int) -> Tuple[int, bool]:
+    """
+    Count rows exactly when cheap, otherwise estimate.
+
+    A count capped at ``threshold + 1`` rows answers small result sets
+    exactly in a single query; only results beyond the cap pay for the
+    planner estimate. Returns ``(count, is_estimate)``.
+    """
+    bounded = queryset.order_by()[:threshold + 1].count()
+    if bounded <= threshold:
+        return bounded, False
+
+    estimate = estimate_count(queryset)
+    if estimate is None:
+        return queryset.count(), False
+    # The estimate can undershoot; the capped count is a known lower bound
+    return max(estimate, bounded), True
+
+
+class FBSCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the view's ``ordering`` with an estimated total.
+
+    The primary key is appended to the ordering as a tie-breaker so pages
+    are stable when the leading field has duplicates.
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-pk',)
+
+    # Use the ViewSet's ``ordering`` attribute instead of ``ordering`` above
+    use_view_ordering = True
+    include_count = True
+
+    def __init__(self):
+        self.count_estimate_threshold = _get_config().get(
+            'COUNT_ESTIMATE_THRESHOLD', DEFAULT_COUNT_ESTIMATE_THRESHOLD)
+        self.count = None
+        self.count_is_estimate = False
+
+    def get_ordering(self, request, queryset, view):
+        view_ordering = getattr(view, 'ordering', None) if self.use_view_ordering else None
+        if view_ordering:
+            if isinstance(view_ordering, str):
+                view_ordering = (view_ordering,)
+            self.ordering = self._with_tiebreaker(tuple(view_ordering))
+        return super().get_ordering(request, queryset, view)
+
+    @staticmethod
+    def _with_tiebreaker(ordering: tuple) -> tuple:
+        if any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            return ordering
+        return ordering + ('-pk' if ordering[0].startswith('-') else 'pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.include_count:
+            self.count, self.count_is_estimate = count_with_estimate(
+                queryset, self.count_estimate_threshold)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.include_count:
+            payload = {'count': self.count, 'count_is_estimate': self.count_is_estimate, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        if self.include_count:
+            response_schema['properties'] = {
+                'count': {'type': 'integer', 'example': 123},
+                'count_is_estimate': {'type': 'boolean', 'example': False},
+                **response_schema['properties'],
+            }
+        return response_schema
+
+
+class AuditLogCursorPagination(FBSCursorPagination):
+    """
+    Cursor pagination for audit logs.
+
+    Pages are fetched with ``WHERE timestamp < cursor`` on the
+    ``(solution, timestamp)`` index, ordered by ``(-timestamp, -id)``. Rows
+    sharing the cursor's timestamp are stepped over with a small ``OFFSET``
+    (DRF's cursor filters on the leading ordering field only), so page cost
+    does not grow with depth.
+    """
+
+    ordering = ('-timestamp', '-id')
+    use_view_ordering = False
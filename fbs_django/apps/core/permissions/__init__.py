@@ -1,2 +1,20 @@
 # FBS Permissions Package
+from rest_framework.permissions import BasePermission
 
+
+class IsSystemAdmin(BasePermission):
+    """Allow system (superuser) administrators only"""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
+
+
+class IsSolutionAdmin(BasePermission):
+    """Allow administrators of the user's solution and system administrators"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and (user.is_superuser or getattr(user, 'is_solution_admin', False)))
+
+
+__all__ = ['IsSolutionAdmin', 'IsSystemAdmin']
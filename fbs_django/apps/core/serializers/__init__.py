@@ -1 +1,22 @@
 # FBS Core API Serializers
+from .core import (
+    FBSSolutionSerializer,
+    FBSUserSerializer,
+    FBSAuditLogSerializer,
+    FBSAPITokenSerializer,
+    FBSSystemSettingsSerializer,
+    LoginSerializer,
+    TokenRefreshSerializer,
+)
+from .mixins import SparseFieldsMixin
+
+__all__ = [
+    'FBSSolutionSerializer',
+    'FBSUserSerializer',
+    'FBSAuditLogSerializer',
+    'FBSAPITokenSerializer',
+    'FBSSystemSettingsSerializer',
+    'LoginSerializer',
+    'TokenRefreshSerializer',
+    'SparseFieldsMixin',
+]
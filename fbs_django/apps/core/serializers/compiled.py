@@ -0,0 +1,176 @@
+"""
+FBS Compiled Read Serializers
+
+Fast path for large read-only list pages. ``compile_read_serializer()``
+turns a serializer's field list into a flat ``row -> dict`` function fed by
+``queryset.values_list()``: no model instances, no per-field
+``get_attribute``/``to_representation`` dispatch for plain columns.
+
+Output matches ``serializer.data`` row for row, including DRF's handling of
+null relations (``source='user.username'`` with no user drops the key).
+Serializers with fields that cannot be read from columns (method fields,
+nested serializers, properties) do not compile; callers fall back to the
+regular serializer.
+"""
+import copy
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from ..utils.lru import LRUCache
+
+
+# Field types whose to_representation() returns database values unchanged
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.JSONField,
+    serializers.ReadOnlyField,
+)
+
+# Sparse fieldsets (?fields=) make the key space client controlled, so the
+# cache is bounded; a rare subset is simply recompiled
+DEFAULT_CACHE_SIZE = 256
+_NOT_COMPILABLE = object()
+_compiled_cache = LRUCache(
+    maxsize=getattr(settings, 'FBS_CONFIG', {}).get('COMPILED_SERIALIZER_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+)
+
+
+class CompiledReadSerializer:
+    """
+    Row-to-dict function for one serializer field list.
+
+    ``columns`` are the ``values_list()`` paths the function reads, in row
+    order; ``to_dict`` converts one row.
+    """
+
+    def __init__(self, columns: List[str], to_dict: Callable[[tuple], Dict[str, Any]], source: str):
+        self.columns = columns
+        self.to_dict = to_dict
+        self.source = source  # Generated code, for debugging
+
+    def values_list(self, queryset, extra_columns=()):
+        """``queryset.values_list(named=True)`` over the compiled columns"""
+        # The view and paginator orderings can repeat a column (timestamp)
+        columns = list(dict.fromkeys([*self.columns, *extra_columns]))
+        return queryset.values_list(*columns, named=True)
+
+    def serialize(self, rows) -> List[Dict[str, Any]]:
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+def _is_passthrough(field) -> bool:
+    if isinstance(field, PrimaryKeyRelatedField):
+        # values_list() yields the key itself, not a related instance
+        return field.pk_field is None
+    if isinstance(field, serializers.ChoiceField):
+        return all(isinstance(key, str) for key in field.choices)
+    if isinstance(field, serializers.JSONField):
+        return not field.binary
+    if isinstance(field, serializers.FileField):
+        return False
+    return isinstance(field, _PASSTHROUGH_FIELDS)
+
+
+def _resolve_columns(model, attrs) -> Optional[Tuple[str, List[str]]]:
+    """
+    Map source attrs to ``(value_column, nullable_relation_columns)``.
+
+    Returns ``None`` when a source is not a chain of forward concrete fields.
+    """
+    guards = []
+    for index, attr in enumerate(attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+
+        path = '__'.join(attrs[:index + 1])
+        if index == len(attrs) - 1:
+            return path, guards
+        if not model_field.is_relation:
+            return None
+        if model_field.null:
+            # A null relation makes DRF's get_attribute fail mid-path
+            guards.append(path)
+        model = model_field.related_model
+    return None
+
+
+def compile_read_serializer(serializer) -> Optional[CompiledReadSerializer]:
+    """
+    Compile a bound serializer instance (after any sparse-field pruning).
+
+    Returns ``None`` when some field cannot be read from columns.
+    """
+    serializer = getattr(serializer, 'child', serializer)
+    fields = [field for field in serializer.fields.values() if not field.write_only]
+    key = (type(serializer), tuple(field.field_name for field in fields))
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = _compile(serializer.Meta.model, fields) or _NOT_COMPILABLE
+        _compiled_cache.set(key, compiled)
+    return None if compiled is _NOT_COMPILABLE else compiled
+
+
+def _compile(model, fields) -> Optional[CompiledReadSerializer]:
+    columns: List[str] = []
+    namespace: Dict[str, Any] = {}
+    lines = ['def to_dict(row):', '    data = {}']
+
+    def column_index(path):
+        if path not in columns:
+            columns.append(path)
+        return columns.index(path)
+
+    for number, field in enumerate(fields):
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                              serializers.HiddenField)) or field.source == '*':
+            return None
+        resolved = _resolve_columns(model, field.source_attrs)
+        if resolved is None:
+            return None
+        path, guards = resolved
+
+        name = repr(field.field_name)
+        value = f'row[{column_index(path)}]'
+        if _is_passthrough(field):
+            assign = f'data[{name}] = {value}'
+        else:
+            # Unbound copy so the cache does not keep the first request's serializer alive
+            namespace[f'convert_{number}'] = copy.deepcopy(field).to_representation
+            assign = f'data[{name}] = None if {value} is None else convert_{number}({value})'
+
+        if not guards:
+            lines.append(f'    {assign}')
+            continue
+
+        # Same outcome as Field.get_attribute() on an AttributeError
+        if field.default is not empty:
+            namespace[f'default_{number}'] = copy.deepcopy(field).get_default
+            missing = f'data[{name}] = default_{number}()'
+        elif field.allow_null:
+            missing = f'data[{name}] = None'
+        elif not field.required:
+            missing = 'pass'
+        else:
+            return None
+        condition = ' or '.join(f'row[{column_index(guard)}] is None' for guard in guards)
+        lines.append(f'    if {condition}:')
+        lines.append(f'        {missing}')
+        lines.append('    else:')
+        lines.append(f'        {assign}')
+
+    lines.append('    return data')
+    source = '\n'.join(lines)
+    exec(compile(source, f'<compiled serializer {model.__name__}>', 'exec'), namespace)
+    return CompiledReadSerializer(columns, namespace['to_dict'], source)
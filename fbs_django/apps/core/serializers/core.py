@@ -8,6 +8,8 @@ from django.contrib.auth import authenticate
 from ..models import (
     FBSSolution, FBSUser, FBSAuditLog, FBSAPIToken, FBSSystemSettings
 )
+from ..utils.tenant_health import get_tenant_health_snapshot, get_tenant_status
+from .mixins import SparseFieldsMixin
 
 
 class FBSSolutionSerializer(serializers.ModelSerializer):
@@ -27,15 +29,22 @@ class FBSSolutionSerializer(serializers.ModelSerializer):
 
     def get_user_count(self, obj):
         """Get user count for this solution"""
-        return obj.users.count()
+        # SolutionViewSet annotates the count; single instances fall back to a query
+        user_count = getattr(obj, 'user_count', None)
+        if user_count is None:
+            user_count = obj.users.count()
+        return user_count
 
     def get_database_status(self, obj):
-        """Get database connection status"""
-        # In a real implementation, this would check actual DB connectivity
-        return "connected"
+        """Get database status from the background tenant health probe"""
+        # One snapshot per serializer; list responses share the child serializer
+        snapshot = getattr(self, '_tenant_health', None)
+        if snapshot is None:
+            snapshot = self._tenant_health = get_tenant_health_snapshot()
+        return get_tenant_status(snapshot, obj.name)
 
 
-class FBSUserSerializer(serializers.ModelSerializer):
+class FBSUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for FBS users"""
 
     solution_name = serializers.CharField(source='solution.name', read_only=True)
@@ -76,7 +85,7 @@ class FBSUserSerializer(serializers.ModelSerializer):
         return user
 
 
-class FBSAuditLogSerializer(serializers.ModelSerializer):
+class FBSAuditLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for audit logs"""
 
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -94,7 +103,7 @@ class FBSAuditLogSerializer(serializers.ModelSerializer):
         ]
 
 
-class FBSAPITokenSerializer(serializers.ModelSerializer):
+class FBSAPITokenSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for API tokens"""
 
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -105,13 +114,16 @@ class FBSAPITokenSerializer(serializers.ModelSerializer):
         model = FBSAPIToken
         fields = [
             'id', 'user', 'user_username', 'solution_name', 'name',
-            'token', 'scopes', 'is_active', 'expires_at',
-            'last_used_at', 'created_at', 'is_expired'
+            'token', 'token_prefix', 'scopes', 'is_active', 'expires_at',
+            'last_used_at', 'usage_count', 'created_at', 'is_expired'
         ]
         read_only_fields = [
-            'id', 'token', 'created_at', 'last_used_at',
+            'id', 'token', 'token_prefix', 'created_at', 'last_used_at', 'usage_count',
             'user_username', 'solution_name', 'is_expired'
         ]
+        projection_dependencies = {
+            'is_expired': ['expires_at'],
+        }
 
     def get_is_expired(self, obj):
         """Check if token is expired"""
@@ -0,0 +1,103 @@
+"""
+FBS Serializer Mixins
+
+Sparse fieldsets for read endpoints: ``?fields=id,username`` keeps only the
+listed fields, ``?exclude=details`` drops fields. ``ProjectionMixin`` (see
+``apps.core.views.mixins``) pushes the remaining fields down into
+``queryset.only()`` and drops joins no remaining field needs.
+"""
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_list(request, param: str) -> Optional[Set[str]]:
+    """Read a comma separated field list from the query string"""
+    if request is None:
+        return None
+    raw = request.query_params.get(param) if hasattr(request, 'query_params') else request.GET.get(param)
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ``ModelSerializer`` mixin honouring ``?fields=`` and ``?exclude=`` on reads.
+
+    Fields without a model source (``SerializerMethodField`` and the like)
+    declare the model fields they read in ``Meta.projection_dependencies``;
+    without an entry they are assumed to need nothing.
+    """
+
+    fields_param = 'fields'
+    exclude_param = 'exclude'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_projected = False
+
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        requested = parse_field_list(request, self.fields_param)
+        excluded = parse_field_list(request, self.exclude_param)
+        if requested is None and excluded is None:
+            return
+
+        for name in list(self.fields):
+            if (requested is not None and name not in requested) or (excluded and name in excluded):
+                self.fields.pop(name)
+        self.is_projected = True
+
+    def get_model_projection(self) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Model paths for the remaining fields as ``(only_fields, select_related)``.
+
+        Returns ``None`` when a field reads something the projection cannot
+        see (e.g. a model property), in which case nothing should be deferred.
+        """
+        model = self.Meta.model
+        dependencies = getattr(self.Meta, 'projection_dependencies', {})
+        only, related = {model._meta.pk.name}, set()
+
+        for name, field in self.fields.items():
+            if field.source == '*':
+                paths = [path.split('__') for path in dependencies.get(name, ())]
+            else:
+                paths = [field.source_attrs]
+
+            for attrs in paths:
+                resolved = self._resolve_path(model, attrs)
+                if resolved is None:
+                    return None
+                only.update(resolved[0])
+                related.update(resolved[1])
+
+        return sorted(only), sorted(related)
+
+    @staticmethod
+    def _resolve_path(model, attrs: Iterable[str]) -> Optional[Tuple[Set[str], Set[str]]]:
+        """Map ``['user', 'solution', 'name']`` to only/select_related paths"""
+        only, related = set(), set()
+        attrs = list(attrs)
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                # Reverse relations and the like are not columns of this row
+                return None
+
+            path = '__'.join(attrs[:index + 1])
+            only.add(path)
+            if not model_field.is_relation:
+                break
+            if index < len(attrs) - 1:
+                # Traversed forward relation: join it instead of a query per row
+                related.add(path)
+                model = model_field.related_model
+        return only, related
@@ -4,10 +4,13 @@ FBS Core Services
 Main FBS orchestration interface - Django version.
 Provides unified access to all FBS services with multi-tenant support.
 """
+import threading
+
 from django.core.cache import cache
 from django.conf import settings
 from typing import Optional, Dict, Any, List
 from .models import FBSSolution, FBSUser
+from .utils.lru import LRUCache
 
 
 class FBSInterface:
@@ -18,19 +21,25 @@ class FBSInterface:
     isolation and caching. Mirrors the FastAPI FBSInterface pattern.
     """
 
-    def __init__(self, solution_name: str, license_key: str = None, user: FBSUser = None):
+    def __init__(self, solution_name: str, license_key: str = None, user: FBSUser = None,
+                 solution: Optional[FBSSolution] = None):
         """
         Initialize FBS interface for a specific solution.
 
+        Prefer ``get_fbs_interface()``, which reuses warm interfaces.
+
         Args:
             solution_name: Name of the solution to work with
             license_key: Optional license key for validation
             user: Optional user for permission checks
+            solution: Already loaded solution (skips the lookup query)
         """
-        try:
-            self.solution = FBSSolution.objects.get(name=solution_name, is_active=True)
-        except FBSSolution.DoesNotExist:
-            raise ValueError(f"Solution '{solution_name}' not found or inactive")
+        if solution is None:
+            try:
+                solution = FBSSolution.objects.get(name=solution_name, is_active=True)
+            except FBSSolution.DoesNotExist:
+                raise ValueError(f"Solution '{solution_name}' not found or inactive")
+        self.solution = solution
 
         self.solution_name = solution_name
         self.license_key = license_key
@@ -514,6 +523,97 @@ class FBSInterface:
         cache.delete_pattern(f'*:solution:{self.solution.name}:*')
         cache.delete(self._cache_key)
 
+    def for_user(self, user: FBSUser) -> 'UserBoundFBSInterface':
+        """View of this interface for one user, sharing its services"""
+        return UserBoundFBSInterface(self, user)
+
+
+class UserBoundFBSInterface:
+    """
+    A pooled ``FBSInterface`` seen by one user.
+
+    Everything except ``user`` is read from the pooled interface, so
+    services it has already built are reused and services built through
+    the view stay warm for later requests on the same thread. Like the
+    pooled interface, a view must not be handed to another thread.
+    """
+
+    __slots__ = ('interface', 'user')
+
+    def __init__(self, interface: FBSInterface, user: FBSUser):
+        self.interface = interface
+        self.user = user
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+
+DEFAULT_POOL_SIZE = 128
+DEFAULT_POOL_TTL = 3600  # seconds
+
+
+class FBSInterfacePool:
+    """
+    Bounded LRU of warm ``FBSInterface`` objects per thread and ``(solution_name, license_key)``.
+
+    Pooled interfaces keep their lazily built services (Odoo connections,
+    license lookups, ...) across requests. Each worker thread gets its own
+    interfaces: the lazy service properties are not locked and the services
+    (e.g. ``OdooService`` session state) are not written to be shared
+    between threads, so nothing pooled is ever used by two threads at once.
+    Builds need no lock either; a thread only ever builds its own entries.
+
+    Entries for a solution are dropped in every thread on
+    ``solution_updated``/``solution_deleted`` (see ``apps.core.signals``);
+    the TTL bounds staleness for changes made in other worker processes.
+    ``MAX_SIZE`` caps the entries of all threads together.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        config = getattr(settings, 'FBS_CONFIG', {}).get('INTERFACE_POOL', {})
+        self._interfaces = LRUCache(
+            maxsize=maxsize or config.get('MAX_SIZE', DEFAULT_POOL_SIZE),
+            ttl=ttl if ttl is not None else config.get('TTL', DEFAULT_POOL_TTL),
+        )
+
+    def get(self, solution_name: str, license_key: str = None) -> FBSInterface:
+        """Get this thread's warm interface, building it on first use"""
+        # A reused thread id belongs to a thread that has exited, so handing
+        # its interface to the new thread never shares it concurrently
+        key = (threading.get_ident(), solution_name, license_key)
+        interface = self._interfaces.get(key)
+        if interface is None:
+            interface = FBSInterface(solution_name, license_key)
+            self._interfaces.set(key, interface)
+        return interface
+
+    def invalidate_solution(self, solution_id):
+        """Drop pooled interfaces of a solution (matched by id, so renames are covered)"""
+        return self._interfaces.discard_where(lambda key, value: value.solution.pk == solution_id)
+
+    def clear(self):
+        self._interfaces.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._interfaces.stats()
+
+
+# Process-wide interface pool
+interface_pool = FBSInterfacePool()
+
+
+def get_fbs_interface(solution_name: str, license_key: str = None, user: FBSUser = None):
+    """
+    Get a pooled ``FBSInterface`` for a solution.
+
+    Interfaces are pooled per thread. With ``user``, returns a per-user
+    view that shares the pooled services.
+    Raises ``ValueError`` for unknown or inactive solutions, like
+    ``FBSInterface``.
+    """
+    interface = interface_pool.get(solution_name, license_key)
+    return interface.for_user(user) if user is not None else interface
+
 
 class CacheService:
     """
@@ -550,6 +650,10 @@ class CacheService:
 
 __all__ = [
     'FBSInterface',
+    'UserBoundFBSInterface',
+    'FBSInterfacePool',
+    'interface_pool',
+    'get_fbs_interface',
     'CacheService',
 ]
 
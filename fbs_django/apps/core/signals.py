@@ -3,10 +3,10 @@ FBS Core Signals
 
 Django signals for FBS core functionality.
 """
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import Signal
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from .utils.audit import log_audit_event
+from .utils.audit import build_change_details, get_ignored_user_fields, log_audit_event
 
 
 # Custom FBS signals
@@ -21,6 +21,11 @@ license_feature_accessed = Signal()  # sender: Solution, feature_name, user
 system_setting_changed = Signal()  # sender: FBSSystemSettings, old_value, new_value
 
 
+def _saved_without_changes(instance, kwargs):
+    """True for a post_save of a loaded instance whose fields did not change"""
+    return kwargs.get('created') is False and instance.get_changed_fields() == {}
+
+
 # Signal handlers
 def handle_user_login(sender, request, user, **kwargs):
     """Handle user login events"""
@@ -78,20 +83,28 @@ def handle_solution_created(sender, instance, created, **kwargs):
 
 def handle_solution_updated(sender, instance, created, **kwargs):
     """Handle solution updates"""
-    if not created:
-        log_audit_event(
-            action='update',
-            resource_type='solution',
-            resource_id=str(instance.id),
-            solution=instance,
-            details={
-                'solution_name': instance.name,
-                'display_name': instance.display_name,
-            }
-        )
+    if created:
+        return
 
-        # Send custom signal
-        solution_updated.send(sender=instance)
+    changes = instance.get_changed_fields()
+    if changes == {}:
+        # Saved without modifications; nothing to audit or invalidate
+        return
+
+    log_audit_event(
+        action='update',
+        resource_type='solution',
+        resource_id=str(instance.id),
+        solution=instance,
+        details={
+            'solution_name': instance.name,
+            'display_name': instance.display_name,
+            'changed_fields': sorted(changes) if changes else [],
+        }
+    )
+
+    # Send custom signal
+    solution_updated.send(sender=instance)
 
 
 def handle_solution_deleted(sender, instance, **kwargs):
@@ -127,20 +140,36 @@ def handle_user_created(sender, instance, created, **kwargs):
         )
 
 
+def _only_ignored_fields_saved(kwargs):
+    """True for ``save(update_fields=...)`` touching only unaudited user fields"""
+    update_fields = kwargs.get('update_fields')
+    return bool(update_fields) and set(update_fields) <= get_ignored_user_fields()
+
+
 def handle_user_updated(sender, instance, created, **kwargs):
-    """Handle user updates"""
-    if not created and hasattr(instance, 'solution'):
-        log_audit_event(
-            action='update',
-            resource_type='user',
-            resource_id=str(instance.id),
-            solution=instance.solution,
-            user=instance,
-            details={
-                'username': instance.username,
-                'email': instance.email,
-            }
-        )
+    """Handle user updates, auditing the fields that actually changed"""
+    if created or not hasattr(instance, 'solution') or _only_ignored_fields_saved(kwargs):
+        return
+
+    details = {
+        'username': instance.username,
+        'email': instance.email,
+    }
+    changes = instance.get_changed_fields()
+    if changes is not None:
+        details['changes'] = build_change_details(changes, ignored_fields=get_ignored_user_fields())
+        if not details['changes']:
+            # Nothing but ignored fields (e.g. last_login) changed
+            return
+
+    log_audit_event(
+        action='update',
+        resource_type='user',
+        resource_id=str(instance.id),
+        solution=instance.solution,
+        user=instance,
+        details=details,
+    )
 
 
 def handle_api_token_used(sender, instance, **kwargs):
@@ -161,25 +190,34 @@ def handle_api_token_used(sender, instance, **kwargs):
     api_token_used.send(sender=instance, user=instance.user)
 
 
-def handle_system_setting_changed(sender, instance, **kwargs):
+def handle_system_setting_changed(sender, instance, created, **kwargs):
     """Handle system setting changes"""
-    # This would need to track old vs new values
-    # For now, just log the change
+    changes = instance.get_changed_fields()
+    if not created and changes == {}:
+        # Saved without modifications
+        return
+
+    if created or changes is None or 'value' in changes:
+        old_value = changes['value'][0] if changes and 'value' in changes else None
+    else:
+        old_value = instance.value
+
     log_audit_event(
-        action='update',
+        action='create' if created else 'update',
         resource_type='system_setting',
         resource_id=instance.key,
         solution=None,  # System-wide
         details={
             'setting_key': instance.key,
+            'old_value': old_value,
             'new_value': instance.value,
             'setting_type': instance.setting_type,
+            'changed_fields': sorted(changes) if changes else [],
         }
     )
 
-    # Send custom signal with old/new values
-    old_value = getattr(instance, '_original_value', None)
-    if old_value != instance.value:
+    # Typed value only changes with the raw value or its type
+    if old_value != instance.value or (changes and 'setting_type' in changes):
         system_setting_changed.send(
             sender=instance,
             old_value=old_value,
@@ -187,6 +225,57 @@ def handle_system_setting_changed(sender, instance, **kwargs):
         )
 
 
+def handle_user_principal_invalidation(sender, instance, **kwargs):
+    """Drop cached JWT principals and API keys when a user changes"""
+    if _only_ignored_fields_saved(kwargs):
+        # e.g. the last_login update on every login
+        return
+    from .authentication import api_key_cache, principal_cache
+    principal_cache.invalidate_user(instance.pk)
+    api_key_cache.invalidate_user(instance.pk)
+
+
+def handle_solution_principal_invalidation(sender, instance, **kwargs):
+    """Drop cached JWT principals and API keys for all users of a changed solution"""
+    if _saved_without_changes(instance, kwargs):
+        return
+    from .authentication import api_key_cache, principal_cache
+    principal_cache.invalidate_solution(instance.pk)
+    api_key_cache.invalidate_solution(instance.pk)
+
+
+def handle_api_token_invalidation(sender, instance, **kwargs):
+    """Drop a cached API key when its token is revoked, changed or deleted"""
+    from .authentication import api_key_cache
+    api_key_cache.invalidate_key(instance.token)
+
+
+def handle_system_settings_cache_invalidation(sender, instance, **kwargs):
+    """Publish a new system settings version so every worker reloads"""
+    if _saved_without_changes(instance, kwargs):
+        return
+    from .utils.settings import system_settings
+    system_settings.invalidate(using=kwargs.get('using') or 'default')
+
+
+def handle_solution_cache_invalidation(sender, **kwargs):
+    """Drop the in-process active solution cache when a solution changes"""
+    from .utils.solutions import active_solutions
+    active_solutions.invalidate()
+
+
+def handle_interface_pool_invalidation(sender, **kwargs):
+    """Drop pooled FBSInterface objects of a changed or deleted solution"""
+    from .services import interface_pool
+    interface_pool.invalidate_solution(sender.pk)
+
+
+def handle_solution_database_removed(sender, **kwargs):
+    """Close and forget the tenant database alias of a deleted solution"""
+    from .utils.tenant_connections import tenant_connections
+    tenant_connections.unregister(sender.name)
+
+
 # Connect signals
 user_logged_in.connect(handle_user_login)
 user_logged_out.connect(handle_user_logout)
@@ -203,15 +292,31 @@ def connect_model_signals():
     post_save.connect(handle_user_created, sender=FBSUser)
     post_save.connect(handle_user_updated, sender=FBSUser)
 
+    # Verified JWT principal and API key caches
+    post_save.connect(handle_api_token_invalidation, sender=FBSAPIToken)
+    post_delete.connect(handle_api_token_invalidation, sender=FBSAPIToken)
+    post_save.connect(handle_user_principal_invalidation, sender=FBSUser)
+    post_delete.connect(handle_user_principal_invalidation, sender=FBSUser)
+    post_save.connect(handle_solution_principal_invalidation, sender=FBSSolution)
+    post_delete.connect(handle_solution_principal_invalidation, sender=FBSSolution)
+
     # API token usage signal
     api_token_used.connect(handle_api_token_used)
 
-    # System setting changes
-    pre_save.connect(
-        lambda sender, instance, **kwargs: setattr(instance, '_original_value',
-                                                  getattr(sender.objects.filter(pk=instance.pk).first(), 'value', None)
-                                                  if instance.pk else None),
-        sender=FBSSystemSettings
-    )
+    # In-process solution caches
+    solution_created.connect(handle_solution_cache_invalidation)
+    solution_updated.connect(handle_solution_cache_invalidation)
+    solution_deleted.connect(handle_solution_cache_invalidation)
+    solution_deleted.connect(handle_solution_database_removed)
+
+    # Pooled FBSInterface objects
+    solution_updated.connect(handle_interface_pool_invalidation)
+    solution_deleted.connect(handle_interface_pool_invalidation)
+
+    # System setting changes (old values come from the load-time snapshot)
     post_save.connect(handle_system_setting_changed, sender=FBSSystemSettings)
 
+    # In-process settings registry
+    post_save.connect(handle_system_settings_cache_invalidation, sender=FBSSystemSettings)
+    post_delete.connect(handle_system_settings_cache_invalidation, sender=FBSSystemSettings)
+
@@ -0,0 +1,43 @@
+"""
+FBS Core Background Tasks
+
+Celery tasks for periodic core maintenance.
+"""
+import logging
+from typing import Optional
+
+from celery import shared_task
+
+
+logger = logging.getLogger('fbs.tasks')
+
+
+@shared_task
+def maintain_audit_partitions(months_ahead: int = 3, using: Optional[str] = None):
+    """Keep upcoming audit partitions created and enforce retention on every audit database"""
+    from django.db import DatabaseError
+    from .utils import audit_partitions
+
+    databases = [(using, None)] if using else audit_partitions.get_audit_databases()
+    results = {}
+    for using, solution_id in databases:
+        try:
+            if not audit_partitions.is_partitioned(using):
+                logger.warning("Audit table on %s is not partitioned; skipping maintenance", using)
+                continue
+            audit_partitions.ensure_partitions(months_ahead, using=using)
+            results[using] = audit_partitions.apply_retention(
+                using=using, solution_ids=None if solution_id is None else [solution_id])
+        except DatabaseError:
+            # One unreachable tenant must not stop maintenance of the others
+            logger.exception("Audit partition maintenance failed on %s", using)
+    return results
+
+
+@shared_task
+def probe_tenant_databases():
+    """Refresh the shared tenant database health snapshot"""
+    from .utils.tenant_health import probe_tenant_databases as probe
+
+    snapshot = probe()
+    return {'checked_at': snapshot['checked_at_iso'], 'tenants': len(snapshot['tenants'])}
@@ -1,3 +1,107 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import FBSAPIToken, FBSAuditLog, FBSSolution, FBSUser
+from .utils.query_budget import check_viewset_query_budgets
+from .views import AuditLogViewSet
+
+
+class CompiledAuditLogListTests(TestCase):
+    """Compiled, projected and cursor-paginated audit log list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.solution = FBSSolution.objects.create(
+            name='acme', display_name='Acme', database_name='djo_acme_db',
+            odoo_database_name='fbs_acme_db',
+        )
+        cls.admin = FBSUser.objects.create_superuser(
+            username='admin', password='secret', solution=cls.solution,
+        )
+        now = timezone.now()
+        FBSAuditLog.objects.bulk_create([
+            FBSAuditLog(
+                user_id=cls.admin.pk, solution_id=cls.solution.pk, action='access',
+                resource_type='user', resource_id=str(i),
+                timestamp=now - timedelta(minutes=i),
+            )
+            for i in range(5)
+        ])
+
+    def list(self, **params):
+        request = APIRequestFactory().get('/api/audit-logs/', params)
+        force_authenticate(request, user=self.admin)
+        response = AuditLogViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_fields_projection_is_paginated(self):
+        data = self.list(fields='id', page_size=2)
+        self.assertEqual([set(row) for row in data['results']], [{'id'}, {'id'}])
+        self.assertIsNotNone(data['next'])
+
+    def export(self, factory):
+        request = factory.get('/api/audit-logs/export/', {'export_format': 'ndjson'})
+        force_authenticate(request, user=self.admin)
+        return AuditLogViewSet.as_view({'get': 'export'})(request)
+
+    def test_export_streams_sync_iterator_under_wsgi(self):
+        response = self.export(APIRequestFactory())
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_export_streams_async_iterator_under_asgi(self):
+        response = self.export(AsyncRequestFactory())
+        # Django 4.2 buffers a sync iterator completely under ASGI
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response.streaming_content]
+
+        lines = b''.join(async_to_sync(consume)()).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['resource_id'] for line in lines], ['0', '1', '2', '3', '4'],
+        )
+
+    def test_excluding_ordering_column(self):
+        data = self.list(exclude='timestamp')
+        self.assertEqual(len(data['results']), 5)
+        self.assertNotIn('timestamp', data['results'][0])
+        self.assertEqual(
+            [row['resource_id'] for row in data['results']], ['0', '1', '2', '3', '4'],
+        )
+
+
+class ViewSetQueryBudgetTests(TestCase):
+    """``check_viewset_query_budgets`` runs every budgeted action"""
+
+    def test_core_viewsets_stay_within_budget(self):
+        solution = FBSSolution.objects.create(
+            name='acme', display_name='Acme', database_name='djo_acme_db',
+            odoo_database_name='fbs_acme_db',
+        )
+        admin = FBSUser.objects.create_superuser(
+            username='admin', password='secret', solution=solution,
+        )
+        FBSAuditLog.objects.create(
+            user=admin, solution=solution, action='access',
+            resource_type='user', resource_id=str(admin.pk),
+        )
+        FBSAPIToken.objects.create(user=admin, name='ci', token='ci-token')
+
+        results = check_viewset_query_budgets(admin)
+
+        for result in results:
+            if result['skipped']:
+                continue
+            self.assertEqual(result['status'], 200, result)
+            self.assertTrue(result['ok'], result)
+        retrieved = {result['view'] for result in results
+                     if result['action'] == 'retrieve' and not result['skipped']}
+        self.assertTrue({'solution', 'fbsuser', 'auditlog', 'apitoken'} <= retrieved)
@@ -28,4 +28,6 @@ urlpatterns = [
 
     # System endpoints
     path('system/info/', views.SystemInfoView.as_view(), name='system_info'),
+    path('system/profiles/', views.ProfileListView.as_view(), name='profile_list'),
+    path('system/profiles/<str:name>/', views.ProfileDetailView.as_view(), name='profile_detail'),
 ]
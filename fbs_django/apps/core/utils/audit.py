@@ -0,0 +1,522 @@
+"""
+FBS Audit Logging
+
+Buffered audit pipeline for ``FBSAuditLog``.
+
+``log_audit_event`` enqueues the event and returns immediately; a background
+worker writes queued events with ``bulk_create`` once ``BATCH_SIZE`` events
+are waiting or every ``FLUSH_INTERVAL`` seconds. With ``DURABILITY = 'spill'``
+batches that cannot be written (database down or queue over its high-water
+mark) are appended to a local JSON-lines file and replayed once the database
+keeps up again. Only connection errors leave events to be retried; rows the
+database rejects outright (e.g. for a deleted solution) are retried one by
+one and dead-lettered, so they cannot block later events. The queue never holds more than ``MAX_QUEUE_SIZE`` events:
+beyond it, enqueueing spills the backlog (``spill``) or drops the oldest
+events and counts them in ``dropped_total`` (``memory``).
+
+Configuration lives in ``FBS_CONFIG['AUDIT']``; set ``ASYNC`` to ``False`` to
+write synchronously (useful in tests and management commands).
+
+Inside ``audit_batch()`` (entered per request by ``AuditBatchMiddleware``)
+events are collected and handed to the writer together when the block
+exits, so one request produces one batched insert.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .background import PeriodicWorker
+
+
+logger = logging.getLogger('fbs.audit')
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_MAX_QUEUE_SIZE = 10000
+DEFAULT_SLOW_FLUSH_MS = 500
+
+SPILL_FILE_PREFIX = 'audit-spill-'
+DEAD_LETTER_FILE_PREFIX = 'audit-dead-letter-'
+
+# Errors after which a write is retried later rather than dead-lettered
+_TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+DEFAULT_IGNORED_USER_FIELDS = ('last_login',)
+REDACTED_FIELDS = ('password',)
+
+# Events collected by the enclosing audit_batch(), if any
+_current_batch: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar('fbs_audit_batch', default=None)
+
+
+def _get_config() -> Dict[str, Any]:
+    return getattr(settings, 'FBS_CONFIG', {}).get('AUDIT', {})
+
+
+class AuditLogWriter:
+    """
+    Queue of pending audit events flushed to the database in batches.
+
+    Events are plain dicts (ids, not model instances) so they can be
+    written from the worker thread or spilled to disk as JSON.
+    """
+
+    def __init__(self):
+        config = _get_config()
+        self.async_enabled = config.get('ASYNC', True)
+        self.batch_size = config.get('BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.max_queue_size = config.get('MAX_QUEUE_SIZE', DEFAULT_MAX_QUEUE_SIZE)
+        self.slow_flush_ms = config.get('SLOW_FLUSH_MS', DEFAULT_SLOW_FLUSH_MS)
+        self.durability = config.get('DURABILITY', 'memory')
+        self._spill_dir = config.get('SPILL_DIR')
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = PeriodicWorker(
+            'fbs-audit-writer',
+            config.get('FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            self.flush,
+        )
+        self._metrics = {
+            'enqueued_total': 0,
+            'written_total': 0,
+            'spilled_total': 0,
+            'replayed_total': 0,
+            'dropped_total': 0,
+            'dead_lettered_total': 0,
+            'failed_flushes': 0,
+            'last_flush_latency_ms': None,
+            'max_flush_latency_ms': 0.0,
+            'last_flush_at': None,
+        }
+
+    # ------------------------------------------------------------------
+    # Enqueueing
+    # ------------------------------------------------------------------
+
+    def enqueue(self, event: Dict[str, Any]):
+        """Queue one event for writing"""
+        self.enqueue_many([event])
+
+    def enqueue_many(self, events: List[Dict[str, Any]]):
+        """Queue several events; they are written together where possible"""
+        if not events:
+            return
+
+        if not self.async_enabled:
+            self._write(events)
+            return
+
+        with self._lock:
+            self._queue.extend(events)
+            self._metrics['enqueued_total'] += len(events)
+            depth = len(self._queue)
+            dropped = 0
+            if depth > self.max_queue_size and self.durability != 'spill':
+                # The writer is not keeping up: drop the oldest events
+                dropped = depth - self.max_queue_size
+                for _ in range(dropped):
+                    self._queue.popleft()
+                self._metrics['dropped_total'] += dropped
+
+        if dropped:
+            logger.error("Audit queue full, dropped %d events", dropped)
+        elif depth > self.max_queue_size:
+            # Spill mode: move the backlog to disk before it grows further
+            self._spill_backlog()
+
+        self._worker.start()
+        if depth >= self.batch_size:
+            self._worker.wake()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self):
+        """Write all queued events in batches of ``batch_size``"""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        break
+                    batch = [self._queue.popleft()
+                             for _ in range(min(self.batch_size, len(self._queue)))]
+
+                if not self._flush_batch(batch):
+                    break
+
+            if self.durability == 'spill' and self._metrics['failed_flushes'] == 0:
+                self._replay_spill_files()
+
+    def _flush_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write one batch; returns False when the database is unavailable"""
+        started = time.perf_counter()
+        unwritten = self._persist(batch)
+        if unwritten:
+            self._metrics['failed_flushes'] += 1
+            self._handle_unwritten(unwritten)
+            return False
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        self._metrics['failed_flushes'] = 0
+        self._metrics['last_flush_latency_ms'] = round(latency_ms, 2)
+        self._metrics['max_flush_latency_ms'] = max(self._metrics['max_flush_latency_ms'], latency_ms)
+        self._metrics['last_flush_at'] = timezone.now().isoformat()
+
+        if latency_ms > self.slow_flush_ms and self.durability == 'spill':
+            # Database is slow: move the backlog to disk instead of letting it grow
+            self._spill_backlog()
+
+        return True
+
+    def _persist(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Write events, returning those left unwritten because the database is unavailable.
+
+        Only connection-level errors leave events unwritten (to be retried).
+        A chunk the database rejects (e.g. an ``IntegrityError`` for a row
+        referencing a deleted solution) is retried row by row and the
+        offending rows are dead-lettered, so one bad event cannot block
+        every later flush.
+        """
+        unwritten: List[Dict[str, Any]] = []
+        for context_solution, group in self._group(events).items():
+            if unwritten:
+                # The database is already failing; do not try the other groups
+                unwritten.extend(group)
+                continue
+            for start in range(0, len(group), self.batch_size):
+                chunk = group[start:start + self.batch_size]
+                failed_at = self._write_chunk(context_solution, chunk)
+                if failed_at is not None:
+                    unwritten.extend(chunk[failed_at:])
+                    unwritten.extend(group[start + len(chunk):])
+                    break
+        return unwritten
+
+    def _write_chunk(self, context_solution: Optional[str], chunk: List[Dict[str, Any]]) -> Optional[int]:
+        """Write one chunk; returns the index of the first unwritten event on a connection error"""
+        try:
+            self._write_group(context_solution, chunk)
+        except _TRANSIENT_ERRORS:
+            logger.exception("Audit flush of %d events failed", len(chunk))
+            return 0
+        except Exception:
+            logger.exception("Audit database rejected %d events, retrying one by one", len(chunk))
+        else:
+            self._metrics['written_total'] += len(chunk)
+            return None
+
+        for index, event in enumerate(chunk):
+            try:
+                self._write_group(context_solution, [event])
+            except _TRANSIENT_ERRORS:
+                logger.exception("Audit flush failed")
+                return index
+            except Exception:
+                self._dead_letter(event)
+            else:
+                self._metrics['written_total'] += 1
+        return None
+
+    def _dead_letter(self, event: Dict[str, Any]):
+        """Give up on an event the database will never accept"""
+        self._metrics['dead_lettered_total'] += 1
+        logger.error("AUDIT dead letter %s %s %s", event.get('action'), event.get('resource_type'),
+                     event.get('resource_id'), extra={'audit': event})
+        if self.durability == 'spill':
+            self._append_events(
+                os.path.join(self.spill_dir, f'{DEAD_LETTER_FILE_PREFIX}{os.getpid()}.jsonl'), [event])
+
+    def _group(self, events: List[Dict[str, Any]]) -> Dict[Optional[str], List[Dict[str, Any]]]:
+        """Group events by the solution context they were logged in"""
+        groups = defaultdict(list)
+        for event in events:
+            if event.get('solution_id') is None:
+                # FBSAuditLog rows are always solution-scoped; keep system
+                # events in the log stream rather than failing the batch
+                logger.info("AUDIT %s %s %s", event['action'], event['resource_type'],
+                            event['resource_id'], extra={'audit': event})
+                continue
+            groups[event.get('context_solution')].append(event)
+        return groups
+
+    def _write(self, events: List[Dict[str, Any]]):
+        """bulk_create events, grouped by the solution context they were logged in"""
+        for context_solution, group in self._group(events).items():
+            self._write_group(context_solution, group)
+
+    def _write_group(self, context_solution: Optional[str], events: List[Dict[str, Any]]):
+        """bulk_create events of one solution context (atomic: all or nothing)"""
+        from ..models import FBSAuditLog
+        from ..middleware.database_router import solution_context
+        from .audit_search import build_search_document
+
+        rows = [
+            FBSAuditLog(
+                user_id=event.get('user_id'),
+                solution_id=event['solution_id'],
+                action=event['action'],
+                resource_type=event['resource_type'],
+                resource_id=event['resource_id'],
+                details=event.get('details') or {},
+                ip_address=event.get('ip_address'),
+                user_agent=event.get('user_agent') or '',
+                search_document=build_search_document(
+                    event['resource_id'], event.get('username', ''), event.get('details'),
+                ),
+                timestamp=event['timestamp'],
+            )
+            for event in events
+        ]
+        with solution_context(context_solution):
+            using = router.db_for_write(FBSAuditLog)
+            # One transaction, so a rejected chunk leaves nothing behind to duplicate on retry
+            with transaction.atomic(using=using):
+                FBSAuditLog.objects.using(using).bulk_create(rows, batch_size=self.batch_size)
+
+    def _handle_unwritten(self, batch: List[Dict[str, Any]]):
+        """Keep events that failed to write"""
+        if self.durability == 'spill':
+            self._spill(batch)
+            self._spill_backlog()
+            return
+
+        with self._lock:
+            # Put the batch back at the head of the queue, dropping the
+            # oldest events if the queue would exceed its bound
+            self._queue.extendleft(reversed(batch))
+            overflow = len(self._queue) - self.max_queue_size
+            for _ in range(max(overflow, 0)):
+                self._queue.popleft()
+            if overflow > 0:
+                self._metrics['dropped_total'] += overflow
+                logger.error("Audit queue full, dropped %d events", overflow)
+
+    # ------------------------------------------------------------------
+    # Spill files
+    # ------------------------------------------------------------------
+
+    @property
+    def spill_dir(self) -> str:
+        """``AUDIT['SPILL_DIR']``, else ``BASE_DIR/var/audit`` (resolved on first spill)"""
+        if self._spill_dir is None:
+            base_dir = getattr(settings, 'BASE_DIR', None) or os.getcwd()
+            self._spill_dir = os.path.join(base_dir, 'var', 'audit')
+        return str(self._spill_dir)
+
+    def _spill_path(self) -> str:
+        return os.path.join(self.spill_dir, f'{SPILL_FILE_PREFIX}{os.getpid()}.jsonl')
+
+    def _spill(self, events: List[Dict[str, Any]]):
+        """Append events to this process's spill file"""
+        if not events:
+            return
+        self._append_events(self._spill_path(), events)
+        self._metrics['spilled_total'] += len(events)
+
+    def _append_events(self, path: str, events: List[Dict[str, Any]]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as spill_file:
+            for event in events:
+                spill_file.write(json.dumps(event, default=str))
+                spill_file.write('\n')
+            spill_file.flush()
+            os.fsync(spill_file.fileno())
+
+    def _spill_backlog(self):
+        """Move everything above the high-water mark to disk"""
+        with self._lock:
+            overflow = len(self._queue) - self.max_queue_size // 2
+            backlog = [self._queue.pop() for _ in range(max(overflow, 0))]
+        backlog.reverse()
+        self._spill(backlog)
+
+    def _replay_spill_files(self):
+        """
+        Write spilled events back to the database, oldest file first.
+
+        Events that could not be written are appended back to the spill file
+        and the remaining files are still tried; events already written are
+        never replayed twice.
+        """
+        if not os.path.isdir(self.spill_dir):
+            return
+
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not (name.startswith(SPILL_FILE_PREFIX) and name.endswith('.jsonl')):
+                continue
+
+            path = os.path.join(self.spill_dir, name)
+            claimed = f'{path}.replaying-{os.getpid()}'
+            try:
+                # Atomic claim so only one process replays a given file
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            with open(claimed, encoding='utf-8') as spill_file:
+                events = [self._load_spilled(line) for line in spill_file if line.strip()]
+
+            written_before = self._metrics['written_total']
+            unwritten = self._persist(events)
+            if unwritten:
+                logger.warning("Audit spill replay left %d of %d events in %s",
+                               len(unwritten), len(events), name)
+                # Append rather than replace: new spills may have recreated the file
+                self._append_events(path, unwritten)
+            os.remove(claimed)
+            self._metrics['replayed_total'] += self._metrics['written_total'] - written_before
+
+    @staticmethod
+    def _load_spilled(line: str) -> Dict[str, Any]:
+        event = json.loads(line)
+        event['timestamp'] = parse_datetime(event['timestamp'])
+        return event
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, flush latency and throughput counters"""
+        return {
+            'queue_depth': self.queue_depth(),
+            'async': self.async_enabled,
+            'durability': self.durability,
+            **self._metrics,
+        }
+
+    def start(self):
+        if self.async_enabled:
+            self._worker.start()
+
+    def stop(self):
+        self._worker.stop()
+
+
+audit_writer: Optional[AuditLogWriter] = None
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Get the process-wide audit writer"""
+    global audit_writer
+    if audit_writer is None:
+        audit_writer = AuditLogWriter()
+    return audit_writer
+
+
+def setup_audit_logging():
+    """Create the audit writer at startup; the worker thread starts on first event"""
+    get_audit_writer()
+
+
+def build_audit_event(action: str, resource_type: str, resource_id: str, solution=None,
+                      user=None, details: Optional[dict] = None, ip_address: str = None,
+                      user_agent: str = None, timestamp=None) -> Dict[str, Any]:
+    """Build a queueable audit event from model instances or ids"""
+    from ..middleware.database_router import get_current_solution
+
+    return {
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': str(resource_id),
+        'solution_id': getattr(solution, 'pk', solution),
+        'user_id': getattr(user, 'pk', user),
+        'username': getattr(user, 'username', '') or '',
+        'details': details or {},
+        'ip_address': ip_address,
+        'user_agent': user_agent or '',
+        'timestamp': timestamp or timezone.now(),
+        # Routing context the event was logged in, restored when writing
+        'context_solution': get_current_solution(),
+    }
+
+
+def get_ignored_user_fields() -> frozenset:
+    """User fields whose changes alone do not produce an audit event"""
+    return frozenset(_get_config().get('IGNORED_USER_FIELDS', DEFAULT_IGNORED_USER_FIELDS))
+
+
+def _audit_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return str(value)
+
+
+def build_change_details(changes: Dict[str, tuple], ignored_fields: Iterable[str] = (),
+                         redacted_fields: Iterable[str] = REDACTED_FIELDS) -> Dict[str, Dict[str, Any]]:
+    """
+    Turn ``{field: (old, new)}`` into JSON-safe ``{field: {'old': .., 'new': ..}}``.
+
+    Ignored fields are left out; redacted fields only record that they changed.
+    """
+    ignored_fields = set(ignored_fields)
+    redacted_fields = set(redacted_fields)
+    details = {}
+    for field_name, (old, new) in changes.items():
+        if field_name in ignored_fields:
+            continue
+        if field_name in redacted_fields:
+            details[field_name] = {'changed': True}
+        else:
+            details[field_name] = {'old': _audit_value(old), 'new': _audit_value(new)}
+    return details
+
+
+@contextmanager
+def audit_batch():
+    """
+    Collect audit events logged in this context and enqueue them together.
+
+    Nested blocks join the outermost batch. Events are enqueued even when
+    the block raises, so failed requests stay audited.
+    """
+    if _current_batch.get() is not None:
+        yield
+        return
+
+    token = _current_batch.set([])
+    try:
+        yield
+    finally:
+        events = _current_batch.get()
+        _current_batch.reset(token)
+        get_audit_writer().enqueue_many(events)
+
+
+def log_audit_event(action: str, resource_type: str, resource_id: str, solution=None,
+                    user=None, details: Optional[dict] = None, ip_address: str = None,
+                    user_agent: str = None, timestamp=None):
+    """
+    Record an audit event.
+
+    The event is queued and written in a batch by the audit writer; the
+    caller does not wait for the INSERT. Within ``audit_batch()`` it is held
+    until the batch closes.
+    """
+    event = build_audit_event(
+        action, resource_type, resource_id,
+        solution=solution, user=user, details=details,
+        ip_address=ip_address, user_agent=user_agent, timestamp=timestamp,
+    )
+    batch = _current_batch.get()
+    if batch is not None:
+        batch.append(event)
+    else:
+        get_audit_writer().enqueue(event)
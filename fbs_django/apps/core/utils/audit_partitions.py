@@ -0,0 +1,277 @@
+"""
+FBS Audit Log Partitioning
+
+Monthly range partitioning of ``fbs_audit_logs`` by ``timestamp`` (PostgreSQL)
+with per-solution retention.
+
+- ``convert_to_partitioned()`` turns the plain table into a partitioned one
+  (one-off; primary key becomes ``(id, timestamp)`` as PostgreSQL requires
+  the partition key in unique constraints).
+- ``ensure_partitions()`` creates the partitions for the coming months.
+- ``apply_retention()`` drops whole partitions older than the longest
+  retention policy and range-deletes older rows for solutions with a
+  shorter ``audit_retention_days``; partition pruning keeps those deletes
+  to the oldest partitions.
+
+Audit rows are solution-scoped, so the router writes them to each tenant's
+``djo_{solution}_db``; ``get_audit_databases()`` lists every database that
+holds an audit table. Run through ``manage.py audit_partitions`` or the
+``maintain_audit_partitions`` Celery task, which cover all of them.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger('fbs.audit')
+
+TABLE = 'fbs_audit_logs'
+DEFAULT_PARTITION = f'{TABLE}_default'
+DEFAULT_RETENTION_DAYS = 365
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding ``month``"""
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def _get_connection(using: str = 'default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('Audit log partitioning requires PostgreSQL')
+    return connection
+
+
+def get_audit_databases() -> List[Tuple[str, Optional[int]]]:
+    """
+    Databases holding an audit table, as ``(alias, solution_id)``.
+
+    One tenant database per active solution, plus ``default`` (solution
+    ``None``) when audit rows written outside a solution context land there.
+    """
+    from ..models import FBSSolution
+    from .tenant_connections import tenant_connections
+
+    databases = []
+    with connections['default'].cursor() as cursor:
+        if TABLE in connections['default'].introspection.table_names(cursor):
+            databases.append(('default', None))
+    for solution_id, name in FBSSolution.objects.filter(is_active=True).values_list('id', 'name'):
+        databases.append((tenant_connections.register(name), solution_id))
+    return databases
+
+
+def is_partitioned(using: str = 'default') -> bool:
+    """Check whether the audit table is already partitioned"""
+    with _get_connection(using).cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(using: str = 'default') -> List[Tuple[str, Optional[date], Optional[date]]]:
+    """List monthly partitions as ``(name, from, to)``, oldest first"""
+    with _get_connection(using).cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s ORDER BY c.relname",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        if name == DEFAULT_PARTITION:
+            continue
+        suffix = name[len(TABLE) + 2:]  # '2026m10'
+        year, month = suffix.split('m')
+        start = date(int(year), int(month), 1)
+        partitions.append((name, start, _add_months(start, 1)))
+    return partitions
+
+
+def _create_partition_sql(month: date) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead: int = 3, using: str = 'default') -> List[str]:
+    """Create partitions from the current month through ``months_ahead`` months ahead"""
+    current = _month_start(timezone.now().date())
+    created = []
+    with _get_connection(using).cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            cursor.execute(_create_partition_sql(month))
+            created.append(partition_name(month))
+    return created
+
+
+def convert_to_partitioned(months_ahead: int = 3, using: str = 'default'):
+    """
+    Convert ``fbs_audit_logs`` into a monthly partitioned table.
+
+    Copies existing rows into partitions covering their months. Run once,
+    during a maintenance window; the table is locked for the copy.
+    """
+    if is_partitioned(using):
+        logger.info("%s is already partitioned", TABLE)
+        return
+
+    connection = _get_connection(using)
+    legacy = f'{TABLE}_legacy'
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT MIN("timestamp"), MAX("timestamp") FROM "{TABLE}"')
+        oldest, newest = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        # INCLUDING IDENTITY gives the new table its own identity sequence
+        # (BigAutoField is an IDENTITY column since Django 4.1)
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY ("id", "timestamp")')
+        cursor.execute(
+            "SELECT a.attidentity FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid "
+            "WHERE c.relname = %s AND a.attname = 'id'",
+            [TABLE],
+        )
+        if not cursor.fetchone()[0]:
+            # Tables created before Django 4.1 use a serial column whose
+            # sequence is dropped with the legacy table; switch to identity
+            cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" DROP DEFAULT')
+            cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY')
+
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        current = _month_start(timezone.now().date())
+        month = _month_start(oldest.date()) if oldest else current
+        last = _add_months(current, months_ahead)
+        if newest and _month_start(newest.date()) > last:
+            last = _month_start(newest.date())
+        while month <= last:
+            cursor.execute(_create_partition_sql(month))
+            month = _add_months(month, 1)
+
+        # Recreate the model's indexes on the parent; PostgreSQL propagates them
+        for index_fields in (('solution_id', 'timestamp'), ('resource_type', 'resource_id'),
+                             ('user_id', 'timestamp'), ('action', 'timestamp')):
+            columns = ', '.join(f'"{field}"' for field in index_fields)
+            name = f'{TABLE}_{"_".join(index_fields)}_part_idx'
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{TABLE}" ({columns})')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS "fbs_audit_search_fts_part_idx" ON "{TABLE}" '
+            f"USING gin (to_tsvector('simple'::regconfig, COALESCE((\"search_document\")::text, '')))"
+        )
+        # Normally installed by migration 0001_pg_trgm
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS "fbs_audit_search_trgm_part_idx" ON "{TABLE}" '
+            f'USING gin ((UPPER("search_document")) gin_trgm_ops)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS "fbs_audit_details_path_part_idx" ON "{TABLE}" '
+            f'USING gin ("details" jsonb_path_ops)'
+        )
+
+        # Foreign keys as Django creates them (cascades are handled by the ORM)
+        for column, target in (('solution_id', 'fbs_solutions'), ('user_id', 'fbs_users')):
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_{column}_part_fk" '
+                f'FOREIGN KEY ("{column}") REFERENCES "{target}" ("id") DEFERRABLE INITIALLY DEFERRED'
+            )
+
+        cursor.execute(f'INSERT INTO "{TABLE}" OVERRIDING SYSTEM VALUE SELECT * FROM "{legacy}"')
+        cursor.execute(f'DROP TABLE "{legacy}"')
+        # Continue numbering after the copied rows
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(\"id\"), 0) + 1, false) "
+            f'FROM "{TABLE}"',
+            [TABLE],
+        )
+
+    logger.info("Converted %s to monthly partitions", TABLE)
+
+
+def get_retention_policies() -> Tuple[int, Dict[int, int]]:
+    """
+    Get the default retention and per-solution overrides, in days.
+
+    Returns ``(default_days, {solution_id: days})``.
+    """
+    from ..models import FBSSolution
+
+    default_days = getattr(settings, 'FBS_CONFIG', {}).get('AUDIT', {}).get(
+        'RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    overrides = dict(
+        FBSSolution.objects.filter(audit_retention_days__isnull=False)
+        .values_list('id', 'audit_retention_days')
+    )
+    return default_days, overrides
+
+
+def apply_retention(using: str = 'default', dry_run: bool = False,
+                    solution_ids: Optional[Iterable[int]] = None) -> Dict[str, object]:
+    """
+    Enforce audit retention.
+
+    Partitions entirely older than the longest policy are dropped; rows of
+    solutions with a shorter policy are deleted by range. ``solution_ids``
+    limits the policies considered to the solutions stored in ``using``
+    (all solutions by default).
+    """
+    from ..models import FBSAuditLog, FBSSolution
+
+    default_days, overrides = get_retention_policies()
+    if solution_ids is None:
+        solution_ids = FBSSolution.objects.values_list('id', flat=True)
+    policies = {solution_id: overrides.get(solution_id, default_days) for solution_id in solution_ids}
+    # Rows without a solution follow the default policy
+    longest_days = max([default_days, *policies.values()])
+    today = timezone.now().date()
+    result = {'dropped_partitions': [], 'deleted_rows': {}}
+
+    # Cheap path: drop whole partitions nobody needs any more
+    drop_before = today - timedelta(days=longest_days)
+    for name, _, upper in list_partitions(using):
+        if upper <= drop_before:
+            result['dropped_partitions'].append(name)
+            if not dry_run:
+                with _get_connection(using).cursor() as cursor:
+                    cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+    # Solutions keeping less than the longest policy need row deletes
+    shorter = {solution_id: days for solution_id, days in policies.items() if days < longest_days}
+    for solution_id, days in shorter.items():
+        cutoff = timezone.now() - timedelta(days=days)
+        queryset = FBSAuditLog.objects.using(using).filter(solution_id=solution_id, timestamp__lt=cutoff)
+        if dry_run:
+            result['deleted_rows'][solution_id] = queryset.count()
+        else:
+            # No dependents or delete signals, so Django issues a single DELETE
+            result['deleted_rows'][solution_id] = queryset.delete()[0]
+
+    return result
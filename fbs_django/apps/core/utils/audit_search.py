@@ -0,0 +1,208 @@
+"""
+FBS Audit Log Search
+
+Index-backed search over ``FBSAuditLog``.
+
+Each row carries a ``search_document``: the resource id, the acting username
+and the flattened ``details`` JSON, written once by the audit pipeline. It is
+indexed twice in PostgreSQL: a full-text GIN index on
+``to_tsvector('simple', search_document)`` and a trigram GIN index on
+``UPPER(search_document)`` for substring matches (``icontains`` compiles to
+``UPPER(search_document) LIKE UPPER('%term%')``, so the index must be on
+the same expression). ``details`` has a ``jsonb_path_ops`` GIN index for
+structured filters. The trigram index needs the ``pg_trgm`` extension
+(installed by migration ``0001_pg_trgm``); on a database without it,
+substring terms are ignored instead of planned onto a missing index.
+
+Query syntax (space separated, quote values containing spaces)::
+
+    details.solution_name=acme     JSON containment on details
+    action=login                   exact match on an indexed column
+    alice invoice                  full-text prefix match on each word
+    10.0.0.*                       trigram substring match for other terms
+
+``plan_audit_search`` turns a query into an ``AuditSearchPlan`` that records
+which index serves each term. Terms no index can serve are ignored rather
+than falling back to a sequential scan.
+"""
+import json
+import re
+import shlex
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+
+SEARCH_CONFIG = 'simple'
+MIN_TERM_LENGTH = 3  # Shortest term a trigram index can serve
+MAX_TERMS = 10
+
+# query key -> model lookup for exact column filters
+STRUCTURED_FIELDS = {
+    'action': 'action',
+    'resource_type': 'resource_type',
+    'resource_id': 'resource_id',
+    'user': 'user__username',
+    'username': 'user__username',
+    'solution': 'solution__name',
+}
+
+_WORD = re.compile(r'^\w+$')
+
+# database alias -> whether pg_trgm is installed
+_trigram_support: Dict[str, bool] = {}
+
+
+def search_vector() -> SearchVector:
+    """The indexed full-text expression; must match the model's GinIndex"""
+    return SearchVector('search_document', config=SEARCH_CONFIG)
+
+
+def has_trigram_support(using: str = 'default') -> bool:
+    """Whether ``pg_trgm`` is installed on a database (checked once per alias)"""
+    supported = _trigram_support.get(using)
+    if supported is not None:
+        return supported
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        supported = False
+    else:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                supported = cursor.fetchone() is not None
+        except DatabaseError:
+            # Not cached: check again once the database is reachable
+            return False
+
+    _trigram_support[using] = supported
+    return supported
+
+
+def flatten_details(details: Any, prefix: str = '') -> List[str]:
+    """Flatten details JSON into ``key value`` tokens"""
+    tokens = []
+    if isinstance(details, dict):
+        for key, value in details.items():
+            tokens.extend(flatten_details(value, f'{prefix}{key}.'))
+    elif isinstance(details, (list, tuple)):
+        for value in details:
+            tokens.extend(flatten_details(value, prefix))
+    elif details is not None and details != '':
+        if prefix:
+            tokens.append(prefix.rstrip('.'))
+        tokens.append(str(details))
+    return tokens
+
+
+def build_search_document(resource_id: str, username: str = '', details: Any = None) -> str:
+    """Build the text indexed for an audit row"""
+    parts = [str(resource_id or ''), username or '', *flatten_details(details or {})]
+    return ' '.join(part for part in parts if part)
+
+
+def _details_containment(path: str, raw_value: str) -> Q:
+    """``details.a.b=value`` -> ``details @> {"a": {"b": value}}``"""
+    keys = path.split('.')
+
+    def nested(value):
+        for key in reversed(keys):
+            value = {key: value}
+        return value
+
+    condition = Q(details__contains=nested(raw_value))
+    try:
+        typed_value = json.loads(raw_value)
+    except ValueError:
+        return condition
+    if typed_value != raw_value:
+        # Match both "42" and 42, true and "true"
+        condition |= Q(details__contains=nested(typed_value))
+    return condition
+
+
+class AuditSearchPlan:
+    """Filters derived from a search query and the index each one uses"""
+
+    def __init__(self):
+        self.filters: List[Q] = []
+        self.full_text_terms: List[str] = []
+        self.steps: List[Tuple[str, str]] = []  # (term, index)
+        self.ignored: List[str] = []
+
+    def apply(self, queryset):
+        """Apply the plan to an ``FBSAuditLog`` queryset"""
+        for condition in self.filters:
+            queryset = queryset.filter(condition)
+
+        if self.full_text_terms:
+            query = SearchQuery(
+                ' & '.join(f'{term}:*' for term in self.full_text_terms),
+                search_type='raw',
+                config=SEARCH_CONFIG,
+            )
+            queryset = queryset.annotate(_search_vector=search_vector()).filter(_search_vector=query)
+
+        return queryset
+
+    def describe(self) -> Dict[str, Any]:
+        """Human-readable plan, e.g. for debugging slow searches"""
+        return {
+            'steps': [{'term': term, 'index': index} for term, index in self.steps],
+            'ignored': self.ignored,
+        }
+
+
+def plan_audit_search(query: str, trigram: bool = True) -> AuditSearchPlan:
+    """
+    Parse a search query and choose an index for every term.
+
+    Pass ``trigram=False`` when the database lacks ``pg_trgm``; substring
+    terms are then ignored.
+    """
+    plan = AuditSearchPlan()
+
+    try:
+        terms = shlex.split(query)
+    except ValueError:
+        terms = query.split()
+
+    for term in terms[:MAX_TERMS]:
+        key, sep, value = term.partition('=')
+
+        if sep and key.startswith('details.') and value:
+            plan.filters.append(_details_containment(key[len('details.'):], value))
+            plan.steps.append((term, 'details jsonb_path_ops GIN'))
+        elif sep and key in STRUCTURED_FIELDS and value:
+            plan.filters.append(Q(**{STRUCTURED_FIELDS[key]: value}))
+            plan.steps.append((term, f'{key} btree'))
+        elif len(term) < MIN_TERM_LENGTH:
+            plan.ignored.append(term)
+        elif _WORD.match(term):
+            plan.full_text_terms.append(term.lower())
+            plan.steps.append((term, 'search_document full-text GIN'))
+        elif not trigram:
+            plan.ignored.append(term)
+        else:
+            # Served by the UPPER(search_document) trigram index
+            plan.filters.append(Q(search_document__icontains=term.strip('*')))
+            plan.steps.append((term, 'UPPER(search_document) trigram GIN'))
+
+    return plan
+
+
+class AuditLogSearchFilter(BaseFilterBackend):
+    """DRF filter backend applying ``?search=`` through the audit search planner"""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        plan = plan_audit_search(query, trigram=has_trigram_support(queryset.db))
+        return plan.apply(queryset)
@@ -0,0 +1,81 @@
+"""
+FBS Background Workers
+
+Daemon-thread helper for periodic in-process work such as flushing
+write-behind buffers. Workers start lazily on first use, so forking servers
+(e.g. gunicorn with ``--preload``) start one per worker process, and they
+run a final pass at interpreter exit.
+"""
+import atexit
+import logging
+import threading
+from typing import Callable, Optional
+
+from django.db import close_old_connections
+
+
+logger = logging.getLogger('fbs.background')
+
+
+class PeriodicWorker:
+    """
+    Run ``callback`` every ``interval`` seconds on a daemon thread.
+
+    ``wake()`` triggers an immediate run, e.g. when a buffer fills up.
+    """
+
+    def __init__(self, name: str, interval: float, callback: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+
+    def start(self):
+        """Start the worker thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def wake(self):
+        """Run the callback as soon as possible"""
+        self._wake_event.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker after one final run"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            self.run_once()
+
+    def run_once(self):
+        """Run the callback once, logging instead of raising"""
+        try:
+            # Worker threads sit outside the request cycle, so drop stale or
+            # broken connections ourselves
+            close_old_connections()
+            self.callback()
+        except Exception:
+            logger.exception("Background worker %s failed", self.name)
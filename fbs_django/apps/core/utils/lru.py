@@ -0,0 +1,102 @@
+"""
+FBS LRU Cache
+
+Small thread-safe, bounded, in-process LRU cache with per-entry expiry.
+Used for hot-path lookups (authentication principals, verified tokens) that
+must not cost a database or cache-backend round trip.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded LRU cache with optional TTL.
+
+    Entries expire after ``ttl`` seconds (or a per-entry ``ttl``/``expires_at``)
+    and the least recently used entry is evicted once ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, or ``default`` when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, deadline = entry
+            if deadline is not None and time.monotonic() >= deadline:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            expires_at: Optional[float] = None):
+        """
+        Store a value.
+
+        Args:
+            ttl: Seconds until expiry (defaults to the cache TTL)
+            expires_at: Absolute expiry as a UNIX timestamp; the earlier of
+                this and ``ttl`` wins
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        deadline = now + ttl if ttl is not None else None
+        if expires_at is not None:
+            wall_deadline = now + (expires_at - time.time())
+            deadline = wall_deadline if deadline is None else min(deadline, wall_deadline)
+
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove a key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove every entry for which ``predicate(key, value)`` is true"""
+        with self._lock:
+            stale = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for monitoring"""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
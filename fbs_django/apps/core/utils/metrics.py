@@ -0,0 +1,165 @@
+"""
+FBS Request Metrics
+
+In-process latency histograms keyed by ``(route, method, solution)``,
+exported in Prometheus text format at ``/metrics``.
+
+Histograms are HDR-style: log-linear buckets with ``SUB_BUCKET_BITS`` bits
+of precision (about 3% relative error) over microsecond values, so
+recording is a couple of integer operations and a dict increment, and
+memory per series stays small however many requests it sees. Metrics are
+per process; Prometheus should scrape every worker (or aggregate with
+``sum``/``max`` by series).
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT >> 1
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_MAX_SERIES = 5000
+OVERFLOW_LABEL = '__other__'
+
+
+def bucket_index(value: int) -> int:
+    """Log-linear bucket for a non-negative integer"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * HALF_SUB_BUCKET_COUNT + (value >> shift) - HALF_SUB_BUCKET_COUNT
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Inclusive lower and exclusive upper value of a bucket"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index + 1
+    offset = index - SUB_BUCKET_COUNT
+    shift = offset // HALF_SUB_BUCKET_COUNT + 1
+    mantissa = offset % HALF_SUB_BUCKET_COUNT + HALF_SUB_BUCKET_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """Latency distribution in microseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros: int):
+        index = bucket_index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, quantile: float) -> int:
+        """Value at ``quantile`` (0..1), as the midpoint of its bucket"""
+        return self.percentiles([quantile])[quantile]
+
+    def percentiles(self, quantiles: Iterable[float]) -> Dict[float, int]:
+        """Several quantiles in one pass over the buckets"""
+        quantiles = sorted(quantiles)
+        result = {}
+        if not self.count:
+            return {quantile: 0 for quantile in quantiles}
+
+        ordered = sorted(self.counts.items())
+        position, seen = 0, 0
+        for quantile in quantiles:
+            rank = max(1, int(quantile * self.count + 0.5))
+            while position < len(ordered) and seen + ordered[position][1] < rank:
+                seen += ordered[position][1]
+                position += 1
+            if position >= len(ordered):
+                result[quantile] = self.max
+            else:
+                lower, upper = bucket_bounds(ordered[position][0])
+                result[quantile] = min((lower + upper - 1) // 2, self.max)
+        return result
+
+    def copy(self) -> 'LatencyHistogram':
+        clone = LatencyHistogram()
+        clone.counts = dict(self.counts)
+        clone.count, clone.total, clone.max = self.count, self.total, self.max
+        return clone
+
+
+class RequestMetrics:
+    """
+    Latency histograms per ``(route, method, solution)`` series.
+
+    The number of series is capped (``FBS_CONFIG['METRICS']['MAX_SERIES']``);
+    requests for new series beyond the cap are folded into an overflow
+    series so unexpected routes or tenants cannot grow memory unbounded.
+    """
+
+    def __init__(self, max_series: Optional[int] = None):
+        config = getattr(settings, 'FBS_CONFIG', {}).get('METRICS', {})
+        self.max_series = max_series or config.get('MAX_SERIES', DEFAULT_MAX_SERIES)
+        self.quantiles = tuple(config.get('QUANTILES', DEFAULT_QUANTILES))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+
+    def record(self, route: str, method: str, solution: str, seconds: float):
+        key = (route, method, solution)
+        micros = int(seconds * 1_000_000)
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                if len(self._series) >= self.max_series:
+                    key = (OVERFLOW_LABEL, method, OVERFLOW_LABEL)
+                    histogram = self._series.get(key)
+                if histogram is None:
+                    histogram = self._series[key] = LatencyHistogram()
+            histogram.record(micros)
+
+    def snapshot(self) -> Dict[Tuple[str, str, str], LatencyHistogram]:
+        """Consistent copy of every series"""
+        with self._lock:
+            return {key: histogram.copy() for key, histogram in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition (version 0.0.4)"""
+        lines: List[str] = [
+            '# HELP fbs_request_duration_seconds Request latency by route, method and solution.',
+            '# TYPE fbs_request_duration_seconds summary',
+        ]
+        max_lines: List[str] = [
+            '# HELP fbs_request_duration_seconds_max Slowest request since process start.',
+            '# TYPE fbs_request_duration_seconds_max gauge',
+        ]
+
+        for (route, method, solution), histogram in sorted(self.snapshot().items()):
+            labels = (f'route="{_escape(route)}",method="{_escape(method)}",'
+                      f'solution="{_escape(solution)}"')
+            for quantile, micros in histogram.percentiles(self.quantiles).items():
+                lines.append(f'fbs_request_duration_seconds{{{labels},quantile="{quantile}"}} '
+                             f'{micros / 1_000_000:.6f}')
+            lines.append(f'fbs_request_duration_seconds_sum{{{labels}}} {histogram.total / 1_000_000:.6f}')
+            lines.append(f'fbs_request_duration_seconds_count{{{labels}}} {histogram.count}')
+            max_lines.append(f'fbs_request_duration_seconds_max{{{labels}}} {histogram.max / 1_000_000:.6f}')
+
+        return '\n'.join(lines + max_lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide request metrics
+request_metrics = RequestMetrics()
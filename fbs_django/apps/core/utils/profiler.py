@@ -0,0 +1,178 @@
+"""
+FBS Request Profiler
+
+Opt-in statistical profiling of individual requests in production.
+
+A POSIX interval timer delivers ``SIGPROF`` (CPU time, the default) or
+``SIGALRM`` (wall time) every ``INTERVAL_MS`` while a request is being
+profiled. The handler records the profiled thread's stack in collapsed form
+(``module:function;module:function count``), the input format of
+flamegraph.pl and speedscope. Between samples the request runs at full
+speed; when nothing is being profiled no timer is armed at all.
+
+Signals are process-wide, so one request per process is profiled at a
+time. Signal handlers can only be installed from the main thread; where
+that is not possible the profiler is unavailable and requests run
+unprofiled.
+
+Profiles are written to ``PROFILE_DIR`` and listed by the admin endpoint
+``/api/core/system/profiles/``.
+"""
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+
+logger = logging.getLogger('fbs.performance')
+
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_MAX_DEPTH = 128
+DEFAULT_MAX_FILES = 200
+PROFILE_SUFFIX = '.collapsed'
+PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.collapsed$')
+
+_TIMER_SIGNALS = {
+    'cpu': (signal.ITIMER_PROF, signal.SIGPROF) if hasattr(signal, 'SIGPROF') else None,
+    'wall': (signal.ITIMER_REAL, signal.SIGALRM) if hasattr(signal, 'SIGALRM') else None,
+}
+
+
+def get_profiling_config() -> Dict:
+    return getattr(settings, 'FBS_CONFIG', {}).get('PROFILING', {})
+
+
+def get_profile_dir() -> str:
+    return str(get_profiling_config().get('PROFILE_DIR', os.path.join(settings.BASE_DIR, 'var', 'profiles')))
+
+
+class SamplingProfiler:
+    """Signal-driven stack sampler for one thread at a time"""
+
+    def __init__(self):
+        config = get_profiling_config()
+        self.interval = config.get('INTERVAL_MS', DEFAULT_INTERVAL_MS) / 1000
+        self.max_depth = config.get('MAX_DEPTH', DEFAULT_MAX_DEPTH)
+        self.mode = config.get('MODE', 'cpu')
+
+        self._lock = threading.Lock()
+        self._installed = False
+        self._target: Optional[int] = None
+        self._samples: Counter = Counter()
+
+    def install(self) -> bool:
+        """Install the signal handler; must run on the main thread"""
+        if self._installed:
+            return True
+        timer = _TIMER_SIGNALS.get(self.mode)
+        if timer is None:
+            logger.warning("Profiling mode %r is not supported on this platform", self.mode)
+            return False
+        try:
+            signal.signal(timer[1], self._handle_signal)
+        except ValueError:
+            # Not on the main thread (e.g. some embedded servers)
+            logger.warning("Request profiler unavailable: signal handlers need the main thread")
+            return False
+        self._installed = True
+        return True
+
+    @property
+    def available(self) -> bool:
+        return self._installed
+
+    def start(self) -> bool:
+        """Start sampling the calling thread; False if busy or unavailable"""
+        if not self._installed or not self._lock.acquire(blocking=False):
+            return False
+        self._samples = Counter()
+        self._target = threading.get_ident()
+        signal.setitimer(_TIMER_SIGNALS[self.mode][0], self.interval, self.interval)
+        return True
+
+    def stop(self) -> Counter:
+        """Stop sampling and return ``{collapsed_stack: count}``"""
+        signal.setitimer(_TIMER_SIGNALS[self.mode][0], 0, 0)
+        self._target = None
+        samples = self._samples
+        self._lock.release()
+        return samples
+
+    def _handle_signal(self, signum, frame):
+        target = self._target
+        if target is None:
+            return
+        if target != threading.main_thread().ident:
+            # The handler runs on the main thread; look up the request thread
+            frame = sys._current_frames().get(target)
+        if frame is None:
+            return
+
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            frame = frame.f_back
+        stack.reverse()
+        self._samples[';'.join(stack)] += 1
+
+
+def write_profile(samples: Counter, label: str) -> Optional[str]:
+    """Write collapsed stacks to the profile directory; returns the file name"""
+    if not samples:
+        return None
+
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+    safe_label = re.sub(r'[^\w.-]+', '_', label)[:120]
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{safe_label}{PROFILE_SUFFIX}"
+    with open(os.path.join(profile_dir, name), 'w', encoding='utf-8') as profile_file:
+        for stack, count in samples.most_common():
+            profile_file.write(f'{stack} {count}\n')
+
+    _prune(profile_dir, get_profiling_config().get('MAX_FILES', DEFAULT_MAX_FILES))
+    return name
+
+
+def _prune(profile_dir: str, max_files: int):
+    profiles = sorted(
+        (entry for entry in os.scandir(profile_dir) if entry.name.endswith(PROFILE_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[:max(len(profiles) - max_files, 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def list_profiles() -> List[Dict]:
+    """Stored profiles, newest first"""
+    profile_dir = get_profile_dir()
+    if not os.path.isdir(profile_dir):
+        return []
+    entries = [entry for entry in os.scandir(profile_dir) if entry.name.endswith(PROFILE_SUFFIX)]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [
+        {'name': entry.name, 'size': entry.stat().st_size, 'modified': entry.stat().st_mtime}
+        for entry in entries
+    ]
+
+
+def get_profile_path(name: str) -> Optional[str]:
+    """Absolute path of a stored profile, or None for unknown or unsafe names"""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(get_profile_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+# Process-wide profiler
+request_profiler = SamplingProfiler()
@@ -0,0 +1,151 @@
+"""
+FBS Query Budgets
+
+Counts the SQL a block of code runs and enforces an upper bound on it, so
+N+1 regressions in serializers show up as failures instead of slow pages.
+
+``QueryCounter`` hooks every configured connection with
+``connection.execute_wrapper`` and works with ``DEBUG = False``.
+``check_viewset_query_budgets()`` runs the list and detail actions of the
+core ViewSets against ``VIEWSET_QUERY_BUDGETS``; it is exposed as
+``manage.py check_query_budgets``.
+"""
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more queries than its budget"""
+
+
+class QueryCounter:
+    """
+    Context manager recording the queries run on the given aliases.
+
+    Each entry of ``queries`` is ``(alias, sql, duration_seconds)``.
+    """
+
+    def __init__(self, using: Optional[Iterable[str]] = None):
+        self.aliases = list(using) if using is not None else list(connections)
+        self.queries: List[Tuple[str, str, float]] = []
+        self._stack: Optional[ExitStack] = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._wrapper_for(alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def _wrapper_for(self, alias: str):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append((alias, sql, time.perf_counter() - started))
+        return wrapper
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_time(self) -> float:
+        """Seconds spent in the database"""
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self) -> Dict[str, int]:
+        """SQL statements run more than once, with their counts"""
+        counts = Counter(sql for _, sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+
+@contextmanager
+def assert_max_queries(limit: int, using: Optional[Iterable[str]] = None, label: str = 'block'):
+    """Fail with ``QueryBudgetExceeded`` if the block runs more than ``limit`` queries"""
+    with QueryCounter(using) as counter:
+        yield counter
+    if counter.count > limit:
+        statements = '\n'.join(f'  [{alias}] {sql}' for alias, sql, _ in counter.queries)
+        raise QueryBudgetExceeded(
+            f'{label} ran {counter.count} queries (budget {limit}):\n{statements}'
+        )
+
+
+# (url basename, action) -> maximum queries, excluding authentication.
+# List budgets include the pagination count: one capped COUNT while results
+# stay under PAGINATION['COUNT_ESTIMATE_THRESHOLD'] (larger results add the
+# planner estimate). None may grow with page size or page depth.
+VIEWSET_QUERY_BUDGETS = {
+    ('solution', 'list'): 2,
+    ('solution', 'retrieve'): 1,
+    ('fbsuser', 'list'): 2,
+    ('fbsuser', 'retrieve'): 1,
+    ('auditlog', 'list'): 2,
+    ('auditlog', 'retrieve'): 1,
+    ('apitoken', 'list'): 2,
+    ('apitoken', 'retrieve'): 1,
+    ('systemsettings', 'list'): 2,
+    ('systemsettings', 'retrieve'): 1,
+}
+
+
+def check_viewset_query_budgets(user, budgets: Optional[Dict[Tuple[str, str], int]] = None,
+                                using: Optional[Iterable[str]] = None) -> List[Dict[str, object]]:
+    """
+    Call every budgeted core ViewSet action as ``user`` and count its queries.
+
+    Detail actions use the first object of the matching list queryset and
+    are skipped when it is empty. Returns one result dict per action.
+    """
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from ..urls.main import router
+
+    budgets = budgets or VIEWSET_QUERY_BUDGETS
+    viewsets = {basename: viewset for _, viewset, basename in router.registry}
+    factory = APIRequestFactory()
+    results = []
+
+    for (basename, action), limit in budgets.items():
+        viewset = viewsets[basename]
+        request = factory.get(f'/{basename}/')
+        force_authenticate(request, user=user)
+        kwargs = {}
+
+        if action == 'retrieve':
+            # Set up the instance the way as_view({'get': 'list'}) would
+            lister = viewset(action_map={'get': 'list'}, action='list', args=(),
+                             kwargs={}, headers={}, format_kwarg=None)
+            lister.request = lister.initialize_request(request)
+            first = lister.get_queryset().first()
+            if first is None:
+                results.append({'view': basename, 'action': action, 'budget': limit,
+                                'queries': None, 'ok': True, 'skipped': True})
+                continue
+            kwargs['pk'] = first.pk
+
+        view = viewset.as_view({'get': action})
+        with QueryCounter(using) as counter:
+            response = view(request, **kwargs)
+            response.render()
+
+        results.append({
+            'view': basename,
+            'action': action,
+            'budget': limit,
+            'queries': counter.count,
+            'status': response.status_code,
+            'duplicates': counter.duplicates(),
+            'ok': counter.count <= limit,
+            'skipped': False,
+        })
+
+    return results
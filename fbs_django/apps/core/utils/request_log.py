@@ -0,0 +1,131 @@
+"""
+FBS Request Log Pipeline
+
+Queue-backed logging for ``fbs.requests``. The request thread only builds a
+small dict and puts a record on a bounded queue; a ``QueueListener`` thread
+does the JSON encoding and I/O. When the queue is full records are dropped
+(and counted) rather than blocking requests.
+
+``setup_request_logging()`` moves whatever handlers ``LOGGING`` configured
+on ``fbs.requests`` behind the queue, or installs a JSON stdout handler if
+there are none.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+
+REQUEST_LOGGER = 'fbs.requests'
+DEFAULT_QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _get_config() -> Dict[str, Any]:
+    return getattr(settings, 'FBS_CONFIG', {}).get('REQUEST_LOGGING', {})
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and extras"""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    ``QueueHandler`` that never blocks and does no formatting.
+
+    The stock handler formats the message on the calling thread; here the
+    record goes on the queue as-is and the listener's handlers format it.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogPipeline:
+    """Queue, handler and listener thread behind the ``fbs.requests`` logger"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue = queue.Queue(maxsize=queue_size or _get_config().get('QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener: Optional[QueueListener] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Route ``fbs.requests`` through the queue (idempotent)"""
+        with self._lock:
+            if self.listener is not None:
+                return
+
+            logger = logging.getLogger(REQUEST_LOGGER)
+            handlers = [handler for handler in logger.handlers if handler is not self.handler]
+            if not handlers:
+                handler = logging.StreamHandler(sys.stdout)
+                handler.setFormatter(JSONFormatter())
+                handlers = [handler]
+
+            for handler in handlers:
+                logger.removeHandler(handler)
+            logger.addHandler(self.handler)
+            # Root handlers would do synchronous I/O on the request thread
+            logger.propagate = False
+            if logger.level == logging.NOTSET:
+                logger.setLevel(logging.INFO)
+
+            self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'dropped': self.handler.dropped,
+            'running': self.listener is not None,
+        }
+
+
+request_log_pipeline = RequestLogPipeline()
+
+
+def setup_request_logging():
+    """Start the request log listener"""
+    request_log_pipeline.start()
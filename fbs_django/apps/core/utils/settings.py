@@ -0,0 +1,144 @@
+"""
+FBS System Settings Registry
+
+Process-local registry of ``FBSSystemSettings`` values, parsed to their
+declared types once at load time.
+
+The first lookup through ``get_system_setting()`` loads every setting (no
+queries at import or ``AppConfig.ready()`` time, so management commands run
+without a migrated database); later lookups are plain dict reads. Saving or deleting a setting bumps a version counter in the cache
+backend when the transaction commits; each worker compares its loaded version with the shared one at
+most once per ``SETTINGS_VERSION_CHECK_INTERVAL`` seconds and reloads when
+it has moved on.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+
+logger = logging.getLogger('fbs.settings')
+
+VERSION_CACHE_KEY = 'fbs:system_settings:version'
+DEFAULT_VERSION_CHECK_INTERVAL = 1.0  # seconds
+
+
+def parse_setting_value(setting_type: str, value: str) -> Any:
+    """Cast a stored setting value to its declared type"""
+    if setting_type == 'integer':
+        return int(value)
+    elif setting_type == 'boolean':
+        return value.lower() in ('true', '1', 'yes', 'on')
+    elif setting_type == 'json':
+        import json
+        return json.loads(value)
+    else:
+        return value
+
+
+class SystemSettingsRegistry:
+    """Typed system settings held in process memory"""
+
+    def __init__(self):
+        self.check_interval = getattr(settings, 'FBS_CONFIG', {}).get(
+            'SETTINGS_VERSION_CHECK_INTERVAL', DEFAULT_VERSION_CHECK_INTERVAL)
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def load(self):
+        """Load and parse every setting from the database"""
+        from ..models import FBSSystemSettings
+
+        version = self._shared_version()
+        values = {}
+        for key, value, setting_type in FBSSystemSettings.objects.values_list(
+                'key', 'value', 'setting_type'):
+            try:
+                values[key] = parse_setting_value(setting_type, value)
+            except (TypeError, ValueError):
+                logger.warning("System setting %s has an invalid %s value", key, setting_type)
+
+        with self._lock:
+            self._values = values
+            self._version = version
+            self._loaded = True
+            self._checked_at = time.monotonic()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a typed setting value"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return self._values.get(key, default)
+
+    def all(self) -> Dict[str, Any]:
+        """Get a copy of all typed settings"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return dict(self._values)
+
+    def _refresh(self):
+        """Reload if another worker (or this one) changed the settings"""
+        self._checked_at = time.monotonic()
+        version = self._shared_version()
+        if self._loaded and version == self._version:
+            return
+        try:
+            self.load()
+        except DatabaseError:
+            logger.exception("Could not reload system settings")
+
+    def _shared_version(self) -> Optional[int]:
+        try:
+            return cache.get(VERSION_CACHE_KEY)
+        except Exception:
+            # Cache backend down: keep serving what we have
+            return self._version
+
+    def invalidate(self, using: str = 'default'):
+        """
+        Mark settings as changed for every worker.
+
+        Published once the surrounding transaction commits; bumping the
+        version earlier would let another worker reload the old row and
+        cache it under the new version.
+        """
+        transaction.on_commit(self._publish, using=using)
+
+    def _publish(self):
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            # Key missing (first change or evicted)
+            cache.add(VERSION_CACHE_KEY, 1, timeout=None)
+        except Exception:
+            logger.exception("Could not publish system settings version")
+
+        with self._lock:
+            self._loaded = False
+            # Reload on the next lookup in this worker
+            self._checked_at = 0.0
+
+
+# Process-wide registry
+system_settings = SystemSettingsRegistry()
+
+
+def initialize_system_settings():
+    """Populate the settings registry now rather than on the first lookup"""
+    try:
+        system_settings.load()
+    except DatabaseError:
+        # System database not migrated yet (e.g. during initial migrate)
+        logger.debug("System settings table unavailable, registry left empty")
+
+
+def get_system_setting(key: str, default: Any = None) -> Any:
+    """Get a typed system setting at dict speed"""
+    return system_settings.get(key, default)
@@ -0,0 +1,61 @@
+"""
+FBS Active Solution Cache
+
+In-process set of active solution names used to validate tenant identifiers
+on the request path without touching the database.
+
+The set is loaded with a single query on first use and dropped whenever a
+solution is created, updated or deleted (see ``apps.core.signals``). A TTL
+bounds staleness for changes made by other worker processes.
+"""
+import threading
+import time
+from typing import FrozenSet, Optional
+
+from django.conf import settings
+
+
+DEFAULT_TTL = 300  # seconds
+
+
+class ActiveSolutionCache:
+    """Process-local cache of active solution names"""
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'FBS_CONFIG', {}).get(
+            'SOLUTION_CACHE_TTL', DEFAULT_TTL)
+        self._lock = threading.Lock()
+        self._names: Optional[FrozenSet[str]] = None
+        self._loaded_at = 0.0
+
+    def is_fresh(self) -> bool:
+        """Whether a lookup can be answered without a database query"""
+        return self._names is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def names(self) -> FrozenSet[str]:
+        """Get the set of active solution names, loading it if needed"""
+        names = self._names
+        if names is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return names
+
+        with self._lock:
+            if self._names is None or time.monotonic() - self._loaded_at >= self.ttl:
+                from ..models import FBSSolution
+                self._names = frozenset(
+                    FBSSolution.objects.filter(is_active=True).values_list('name', flat=True)
+                )
+                self._loaded_at = time.monotonic()
+            return self._names
+
+    def is_active(self, solution_name: str) -> bool:
+        """Check whether a solution name refers to an active solution"""
+        return solution_name in self.names()
+
+    def invalidate(self):
+        """Drop the cached set; the next lookup reloads it"""
+        with self._lock:
+            self._names = None
+
+
+# Process-wide cache
+active_solutions = ActiveSolutionCache()
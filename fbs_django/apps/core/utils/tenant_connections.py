@@ -0,0 +1,229 @@
+"""
+FBS Tenant Connection Registry
+
+Registers per-solution database aliases (``djo_{solution}_db``) and keeps the
+number of open tenant connections bounded.
+
+Aliases for active solutions are registered in one go when the first
+request starts (``preload_on_first_request``, connected to
+``request_started``) instead of one by one on first touch; nothing queries
+the database at import or ``AppConfig.ready()`` time, so management
+commands run without one.
+
+Each worker thread keeps at most ``MAX_OPEN_CONNECTIONS`` tenant connections
+open; when a new tenant is touched the least recently used idle connection
+is closed. Open connections are reused between requests for up to
+``CONN_MAX_AGE`` seconds, after which Django's request-boundary cleanup
+recycles them.
+
+``acquire()`` runs for every routed query, so its common case (the same
+tenant as the previous query on this thread) is a dict lookup and a
+string comparison.
+"""
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+logger = logging.getLogger('fbs.database')
+
+DEFAULT_MAX_OPEN_CONNECTIONS = 16
+DEFAULT_CONN_MAX_AGE = 60
+
+
+def get_solution_alias(solution_name: str) -> str:
+    """Get the database alias for a solution"""
+    return f'djo_{solution_name}_db'
+
+
+class _ThreadConnections(threading.local):
+    """Per-thread LRU of tenant aliases, like Django's own connection storage"""
+
+    def __init__(self):
+        self.lru: 'OrderedDict[str, None]' = OrderedDict()
+        self.last: Optional[str] = None
+
+
+class TenantConnectionRegistry:
+    """
+    Registry of per-solution database aliases with an LRU cap on open connections.
+
+    Aliases are shared process-wide (``connections.databases``); open
+    connections are tracked per thread because Django connections are
+    thread-local. A plain ``threading.local`` is used rather than asgiref's
+    context-scoped ``Local``, which would give every ASGI request a fresh
+    LRU and never enforce the cap.
+    """
+
+    def __init__(self, max_open_connections: Optional[int] = None,
+                 conn_max_age: Optional[int] = None):
+        config = getattr(settings, 'FBS_CONFIG', {}).get('TENANT_DATABASES', {})
+        self.max_open_connections = max(1, max_open_connections or config.get(
+            'MAX_OPEN_CONNECTIONS', DEFAULT_MAX_OPEN_CONNECTIONS))
+        self.conn_max_age = conn_max_age if conn_max_age is not None else config.get(
+            'CONN_MAX_AGE', DEFAULT_CONN_MAX_AGE)
+        self.conn_health_checks = config.get('CONN_HEALTH_CHECKS', True)
+
+        self._lock = threading.Lock()
+        # solution name -> alias, for every registered solution
+        self._aliases: Dict[str, str] = {}
+        self._preloaded = False
+        self._local = _ThreadConnections()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Alias registration
+    # ------------------------------------------------------------------
+
+    def register(self, solution_name: str) -> str:
+        """Register the database alias for a solution (idempotent)"""
+        alias = self._aliases.get(solution_name)
+        if alias is not None:
+            return alias
+
+        alias = get_solution_alias(solution_name)
+        with self._lock:
+            if alias not in connections.databases:
+                # Start from the fully configured default so every key
+                # Django expects (ATOMIC_REQUESTS, OPTIONS, TEST, ...) is present
+                base_config = copy.deepcopy(connections.databases['default'])
+                base_config['NAME'] = alias
+                base_config['CONN_MAX_AGE'] = self.conn_max_age
+                base_config['CONN_HEALTH_CHECKS'] = self.conn_health_checks
+                connections.databases[alias] = base_config
+            self._aliases[solution_name] = alias
+
+        return alias
+
+    def preload(self, solution_names: Optional[Iterable[str]] = None) -> int:
+        """
+        Pre-register aliases for active solutions.
+
+        Called before the first request so request handling never has to
+        build database configuration on first touch. Returns the number of
+        aliases registered.
+        """
+        if solution_names is None:
+            from ..models import FBSSolution
+            solution_names = FBSSolution.objects.filter(
+                is_active=True
+            ).values_list('name', flat=True)
+
+        count = 0
+        for solution_name in solution_names:
+            self.register(solution_name)
+            count += 1
+
+        logger.info("Registered %d tenant database aliases", count)
+        self._preloaded = True
+        return count
+
+    def unregister(self, solution_name: str):
+        """Close and forget the alias for a removed solution"""
+        alias = get_solution_alias(solution_name)
+        with self._lock:
+            self._aliases.pop(solution_name, None)
+        self._close(alias)
+        local = self._local
+        local.lru.pop(alias, None)
+        if local.last == alias:
+            local.last = None
+
+    # ------------------------------------------------------------------
+    # Connection usage
+    # ------------------------------------------------------------------
+
+    def acquire(self, solution_name: str) -> str:
+        """
+        Get the alias for a solution and mark it as most recently used.
+
+        Closes the least recently used idle tenant connections of this
+        thread once more than ``max_open_connections`` are in use.
+        """
+        alias = self._aliases.get(solution_name) or self.register(solution_name)
+        local = self._local
+        if alias == local.last:
+            # Same tenant as the previous query: already most recently used
+            return alias
+
+        lru = local.lru
+        local.last = alias
+        if alias in lru:
+            lru.move_to_end(alias)
+            self._stats['hits'] += 1
+            return alias
+
+        self._stats['misses'] += 1
+        lru[alias] = None
+        if len(lru) > self.max_open_connections:
+            self._evict(lru)
+
+        return alias
+
+    def _evict(self, lru: 'OrderedDict[str, None]'):
+        """Close least recently used connections until under the cap"""
+        for alias in list(lru)[:-1]:
+            if len(lru) <= self.max_open_connections:
+                break
+            if self._close(alias):
+                del lru[alias]
+                self._stats['evictions'] += 1
+
+    def _close(self, alias: str) -> bool:
+        """Close this thread's connection for an alias unless it is busy"""
+        if alias not in connections.databases:
+            return True
+
+        conn = connections[alias]
+        if conn.in_atomic_block:
+            return False
+
+        conn.close()
+        return True
+
+    def close_all(self):
+        """Close every tenant connection held by this thread"""
+        local = self._local
+        for alias in list(local.lru):
+            if self._close(alias):
+                del local.lru[alias]
+        local.last = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for monitoring"""
+        open_aliases = [
+            alias for alias in self._local.lru
+            if connections[alias].connection is not None
+        ]
+        return {
+            'registered_aliases': len(self._aliases),
+            'tracked_connections': len(self._local.lru),
+            'open_connections': len(open_aliases),
+            'max_open_connections': self.max_open_connections,
+            'conn_max_age': self.conn_max_age,
+            **self._stats,
+        }
+
+
+# Process-wide registry
+tenant_connections = TenantConnectionRegistry()
+
+
+def preload_on_first_request(sender, **kwargs):
+    """``request_started`` receiver: preload aliases once per process"""
+    if tenant_connections._preloaded:
+        return
+    try:
+        tenant_connections.preload()
+    except DatabaseError:
+        # Aliases are still registered on first touch; retry next request
+        logger.exception("Could not preload tenant database aliases")
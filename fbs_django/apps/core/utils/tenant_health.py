@@ -0,0 +1,143 @@
+"""
+FBS Tenant Database Health
+
+Background probing of each active solution's databases: the Django tenant
+database (``djo_{solution}_db``) and the Odoo database (``fbs_{solution}_db``).
+
+``probe_tenant_databases()`` (run by the ``probe_tenant_databases`` Celery
+task) checks every database on a short-lived connection of its own and
+stores one snapshot in the shared cache. Request handling only ever reads
+that snapshot, so reporting tenant status costs a single cache read.
+"""
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import load_backend
+from django.utils import timezone
+
+
+logger = logging.getLogger('fbs.database')
+
+SNAPSHOT_CACHE_KEY = 'fbs:tenant_health'
+DEFAULT_INTERVAL = 30  # seconds
+DEFAULT_CONNECT_TIMEOUT = 3  # seconds
+DEFAULT_MAX_WORKERS = 8
+
+STATUS_CONNECTED = 'connected'
+STATUS_DEGRADED = 'degraded'  # One of the two databases is unreachable
+STATUS_UNREACHABLE = 'unreachable'
+STATUS_UNKNOWN = 'unknown'  # Not probed yet, or the snapshot is stale
+
+
+def _get_config() -> Dict[str, Any]:
+    return getattr(settings, 'FBS_CONFIG', {}).get('TENANT_HEALTH', {})
+
+
+def probe_database(db_name: str, connect_timeout: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Check that ``db_name`` accepts connections and answers ``SELECT 1``.
+
+    Uses a throwaway connection built from the default database settings,
+    so probing never touches the request threads' tenant connections.
+    """
+    config = _get_config()
+    settings_dict = copy.deepcopy(connections.databases['default'])
+    settings_dict['NAME'] = db_name
+    if settings_dict['ENGINE'].endswith('postgresql'):
+        settings_dict.setdefault('OPTIONS', {})['connect_timeout'] = (
+            connect_timeout or config.get('CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT))
+
+    backend = load_backend(settings_dict['ENGINE'])
+    wrapper = backend.DatabaseWrapper(settings_dict, alias=f'health:{db_name}')
+    started = time.perf_counter()
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as exc:
+        return {'reachable': False, 'latency_ms': None, 'error': str(exc)[:200]}
+    finally:
+        wrapper.close()
+
+    return {'reachable': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def _combine(django_db: Dict[str, Any], odoo_db: Dict[str, Any]) -> str:
+    reachable = django_db['reachable'] + odoo_db['reachable']
+    if reachable == 2:
+        return STATUS_CONNECTED
+    return STATUS_DEGRADED if reachable else STATUS_UNREACHABLE
+
+
+def probe_tenant_databases() -> Dict[str, Any]:
+    """Probe every active solution's databases and publish the snapshot"""
+    from ..models import FBSSolution
+
+    config = _get_config()
+    interval = config.get('INTERVAL', DEFAULT_INTERVAL)
+    solutions = list(
+        FBSSolution.objects.filter(is_active=True)
+        .values_list('name', 'database_name', 'odoo_database_name')
+    )
+
+    targets = {}
+    for name, database_name, odoo_database_name in solutions:
+        targets[(name, 'django')] = database_name or f'djo_{name}_db'
+        targets[(name, 'odoo')] = odoo_database_name or f'fbs_{name}_db'
+
+    with ThreadPoolExecutor(max_workers=config.get('MAX_WORKERS', DEFAULT_MAX_WORKERS)) as pool:
+        results = dict(zip(targets, pool.map(probe_database, targets.values())))
+
+    tenants = {}
+    for name, _, _ in solutions:
+        django_db, odoo_db = results[(name, 'django')], results[(name, 'odoo')]
+        tenants[name] = {
+            'status': _combine(django_db, odoo_db),
+            'django': {'database': targets[(name, 'django')], **django_db},
+            'odoo': {'database': targets[(name, 'odoo')], **odoo_db},
+        }
+
+    snapshot = {
+        'checked_at': time.time(),
+        'checked_at_iso': timezone.now().isoformat(),
+        'tenants': tenants,
+    }
+    # Outlive a few missed runs; readers treat older snapshots as stale anyway
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, timeout=interval * 10)
+
+    unhealthy = [name for name, tenant in tenants.items() if tenant['status'] != STATUS_CONNECTED]
+    if unhealthy:
+        logger.warning("Tenant databases unhealthy: %s", ', '.join(sorted(unhealthy)))
+    return snapshot
+
+
+def get_tenant_health_snapshot() -> Dict[str, Any]:
+    """
+    Get the latest snapshot (one cache read).
+
+    Returns an empty snapshot when nothing has been probed or the last probe
+    is older than ``STALE_AFTER`` seconds.
+    """
+    config = _get_config()
+    stale_after = config.get('STALE_AFTER', config.get('INTERVAL', DEFAULT_INTERVAL) * 3)
+    try:
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    except Exception:
+        logger.exception("Could not read tenant health snapshot")
+        snapshot = None
+
+    if not snapshot or time.time() - snapshot['checked_at'] > stale_after:
+        return {'checked_at': None, 'tenants': {}}
+    return snapshot
+
+
+def get_tenant_status(snapshot: Dict[str, Any], solution_name: str) -> str:
+    """Status of one solution in a snapshot"""
+    tenant = snapshot['tenants'].get(solution_name)
+    return tenant['status'] if tenant else STATUS_UNKNOWN
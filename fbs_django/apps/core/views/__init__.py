@@ -1 +1,36 @@
 # FBS Core API Views - Headless Implementation
+from .core import (
+    SolutionViewSet,
+    FBSUserViewSet,
+    AuditLogViewSet,
+    APITokenViewSet,
+    SystemSettingsViewSet,
+    LoginView,
+    LogoutView,
+    TokenRefreshView,
+    SystemInfoView,
+)
+from .health import HealthCheckView, DetailedHealthCheckView
+from .metrics import MetricsView
+from .profiling import ProfileListView, ProfileDetailView
+from .mixins import CompiledListMixin, ExportMixin, ProjectionMixin
+
+__all__ = [
+    'SolutionViewSet',
+    'FBSUserViewSet',
+    'AuditLogViewSet',
+    'APITokenViewSet',
+    'SystemSettingsViewSet',
+    'LoginView',
+    'LogoutView',
+    'TokenRefreshView',
+    'SystemInfoView',
+    'HealthCheckView',
+    'DetailedHealthCheckView',
+    'MetricsView',
+    'ProfileListView',
+    'ProfileDetailView',
+    'CompiledListMixin',
+    'ExportMixin',
+    'ProjectionMixin',
+]
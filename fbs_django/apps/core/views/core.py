@@ -8,7 +8,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
+from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import authenticate, login, logout
+from django.db.models import Count
 from django.utils import timezone
 from django.conf import settings
 from ..models import FBSSolution, FBSUser, FBSAuditLog, FBSAPIToken, FBSSystemSettings
@@ -18,6 +20,9 @@ from ..serializers import (
     LoginSerializer, TokenRefreshSerializer
 )
 from ..permissions import IsSolutionAdmin, IsSystemAdmin
+from ..pagination import AuditLogCursorPagination, FBSCursorPagination
+from ..utils.audit_search import AuditLogSearchFilter
+from .mixins import CompiledListMixin, ExportMixin, ProjectionMixin
 
 
 class SolutionViewSet(viewsets.ModelViewSet):
@@ -25,6 +30,7 @@ class SolutionViewSet(viewsets.ModelViewSet):
 
     queryset = FBSSolution.objects.all()
     serializer_class = FBSSolutionSerializer
+    pagination_class = FBSCursorPagination
     permission_classes = [IsAuthenticated, IsSystemAdmin]
     filterset_fields = ['is_active', 'created_at']
     search_fields = ['name', 'display_name']
@@ -33,7 +39,8 @@ class SolutionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter solutions based on user permissions"""
-        queryset = super().get_queryset()
+        # One aggregate instead of a COUNT per serialized solution
+        queryset = super().get_queryset().annotate(user_count=Count('users'))
         user = self.request.user
 
         # System admins can see all solutions
@@ -87,16 +94,18 @@ class SolutionViewSet(viewsets.ModelViewSet):
         )
 
 
-class FBSUserViewSet(viewsets.ModelViewSet):
+class FBSUserViewSet(ExportMixin, CompiledListMixin, ProjectionMixin, viewsets.ModelViewSet):
     """API for FBS user management"""
 
     queryset = FBSUser.objects.select_related('solution')
     serializer_class = FBSUserSerializer
+    pagination_class = FBSCursorPagination
     permission_classes = [IsAuthenticated, IsSolutionAdmin]
     filterset_fields = ['is_active', 'is_solution_admin', 'solution', 'date_joined']
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering_fields = ['date_joined', 'username']
     ordering = ['-date_joined']
+    export_resource_type = 'user'
 
     def get_queryset(self):
         """Filter users based on permissions"""
@@ -118,16 +127,19 @@ class FBSUserViewSet(viewsets.ModelViewSet):
         super().perform_create(serializer)
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ExportMixin, CompiledListMixin, ProjectionMixin, viewsets.ReadOnlyModelViewSet):
     """API for viewing audit logs"""
 
     queryset = FBSAuditLog.objects.select_related('user', 'solution')
     serializer_class = FBSAuditLogSerializer
     permission_classes = [IsAuthenticated, IsSolutionAdmin]
+    pagination_class = AuditLogCursorPagination
+    filter_backends = [DjangoFilterBackend, AuditLogSearchFilter]
     filterset_fields = ['action', 'resource_type', 'solution', 'timestamp']
-    search_fields = ['user__username', 'resource_id', 'details']
+    # ?search= is planned onto the audit search indexes, see AuditLogSearchFilter
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
+    export_resource_type = 'audit_log'
 
     def get_queryset(self):
         """Filter audit logs based on permissions"""
@@ -141,11 +153,12 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.filter(solution=self.request.user.solution)
 
 
-class APITokenViewSet(viewsets.ModelViewSet):
+class APITokenViewSet(ProjectionMixin, viewsets.ModelViewSet):
     """API for managing API tokens"""
 
     queryset = FBSAPIToken.objects.select_related('user__solution')
     serializer_class = FBSAPITokenSerializer
+    pagination_class = FBSCursorPagination
     permission_classes = [IsAuthenticated]
     filterset_fields = ['is_active', 'created_at', 'expires_at']
     search_fields = ['name', 'user__username']
@@ -166,6 +179,7 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
 
     queryset = FBSSystemSettings.objects.all()
     serializer_class = FBSSystemSettingsSerializer
+    pagination_class = FBSCursorPagination
     permission_classes = [IsAuthenticated, IsSystemAdmin]
     filterset_fields = ['setting_type', 'is_system_setting']
     search_fields = ['key', 'description']
@@ -62,6 +62,9 @@ class DetailedHealthCheckView(APIView):
         # Check file system
         health_status['components']['filesystem'] = self._check_filesystem()
 
+        # Check audit pipeline
+        health_status['components']['audit'] = self._check_audit()
+
         # Determine overall status
         unhealthy_components = [
             comp for comp in health_status['components'].values()
@@ -92,11 +95,13 @@ class DetailedHealthCheckView(APIView):
             query_time = time.time() - start_time
 
             if result and result[0] == 1:
+                from apps.core.utils.tenant_connections import tenant_connections
                 return {
                     'status': 'healthy',
                     'message': 'Database connection successful',
                     'query_time_ms': round(query_time * 1000, 2),
                     'engine': connection.vendor,
+                    'tenant_pool': tenant_connections.stats(),
                 }
             else:
                 return {
@@ -238,6 +243,26 @@ class DetailedHealthCheckView(APIView):
                 'message': f'License check failed: {str(e)}',
             }
 
+    def _check_audit(self):
+        """Check audit pipeline backlog and flush latency"""
+        try:
+            from apps.core.utils.audit import get_audit_writer
+            writer = get_audit_writer()
+            metrics = writer.metrics()
+
+            healthy = metrics['failed_flushes'] == 0 and metrics['queue_depth'] < writer.max_queue_size
+            return {
+                'status': 'healthy' if healthy else 'unhealthy',
+                'message': 'Audit pipeline operational' if healthy else 'Audit pipeline backlogged',
+                **metrics,
+            }
+
+        except Exception as e:
+            return {
+                'status': 'unhealthy',
+                'message': f'Audit pipeline check failed: {str(e)}',
+            }
+
     def _check_filesystem(self):
         """Check file system health"""
         try:
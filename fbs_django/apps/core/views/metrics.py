@@ -0,0 +1,37 @@
+"""
+FBS Metrics Endpoint
+
+Prometheus scrape target for the in-process request metrics.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from ..utils.metrics import request_metrics
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsView(View):
+    """
+    Request latency percentiles in Prometheus text format.
+
+    Scrapers must send ``FBS_CONFIG['METRICS']['TOKEN']`` as
+    ``Authorization: Bearer <token>``. Without a configured token the
+    endpoint is only served with ``DEBUG`` on; it lists every tenant's
+    solution name and routes, so it fails closed.
+    """
+
+    def get(self, request):
+        token = getattr(settings, 'FBS_CONFIG', {}).get('METRICS', {}).get('TOKEN')
+        if token:
+            supplied = request.META.get('HTTP_AUTHORIZATION', '')
+            if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+                return HttpResponseForbidden()
+        elif not settings.DEBUG:
+            raise Http404()
+
+        return HttpResponse(request_metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,248 @@
+"""
+FBS View Mixins
+
+Reusable behaviour for core ViewSets.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from ..middleware.database_router import get_current_solution, solution_context
+from ..serializers.compiled import compile_read_serializer
+from ..utils.audit import log_audit_event
+
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+DEFAULT_EXPORT_ASYNC_BATCH_SIZE = 500
+
+
+class ProjectionMixin:
+    """
+    Load only the columns a sparse-fieldset response needs.
+
+    Works with serializers using ``SparseFieldsMixin``: when the client
+    passes ``?fields=`` or ``?exclude=``, the queryset is narrowed with
+    ``only()`` and ``select_related`` is reduced to the relations the
+    remaining fields traverse. Ordering fields are always loaded so cursor
+    pagination does not fetch them row by row.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        serializer = self.get_serializer()
+        serializer = getattr(serializer, 'child', serializer)
+        if not getattr(serializer, 'is_projected', False):
+            return queryset
+
+        projection = serializer.get_model_projection()
+        if projection is None:
+            return queryset
+        only, related = projection
+
+        ordering = list(getattr(self, 'ordering', None) or ())
+        ordering += list(getattr(self.paginator, 'ordering', None) or ()) if self.paginator else []
+        only += [field.lstrip('-') for field in ordering if field.lstrip('-') not in ('pk', '?')]
+
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+
+class CompiledListMixin:
+    """
+    Serve ``list`` through a compiled read serializer.
+
+    Rows come from ``values_list()`` and are turned into dicts by a
+    generated function with the same output as the ViewSet's serializer.
+    Filtering, tenant scoping, sparse fieldsets and pagination are applied
+    as usual. Serializers that do not compile use the regular path.
+    """
+
+    compiled_list = True
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_read_serializer(self.get_serializer()) if self.compiled_list else None
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Cursor pagination reads the position from the ordering columns
+        ordering = list(getattr(self, 'ordering', None) or ())
+        ordering += list(getattr(self.paginator, 'ordering', None) or ()) if self.paginator else []
+        extra_columns = [field.lstrip('-') for field in ordering if field != '?']
+        rows = compiled.values_list(queryset, extra_columns=extra_columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(rows))
+
+
+class _Echo:
+    """File-like object handing each written CSV line straight back"""
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Streaming ``GET .../export/?export_format=ndjson|csv`` action.
+
+    Rows are read through a server-side cursor (``iterator(chunk_size)``)
+    and written to the response as they arrive, so memory stays flat for
+    any export size. The list endpoint's filters, search, tenant scoping
+    and sparse fieldsets apply. Every export is recorded as an ``export``
+    audit event with the number of rows sent.
+
+    Under ASGI the response gets an async iterator: Django 4.2 would read a
+    sync iterator to the end into memory before sending anything. Lines
+    are pulled from the cursor in batches on the request's sync thread.
+    """
+
+    export_formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+    export_resource_type = None
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_formats:
+            raise ValidationError({'export_format': f"Choose one of: {', '.join(self.export_formats)}"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered and getattr(self, 'ordering', None):
+            queryset = queryset.order_by(*self.ordering)
+        # Pin the database now: the stream is consumed after the routing
+        # middleware has reset the solution context
+        queryset = queryset.using(queryset.db)
+
+        records = self._export_records(queryset)
+        if export_format == 'csv':
+            records = self._as_csv(records)
+        else:
+            records = (json.dumps(record, default=str) + '\n' for record in records)
+
+        stream = self._audited(records, export_format)
+        if isinstance(request._request, ASGIRequest):
+            stream = self._async_stream(stream, get_current_solution())
+        else:
+            stream = self._sync_stream(stream, get_current_solution())
+
+        filename = f'{self.basename}-export.{export_format}'
+        response = StreamingHttpResponse(stream, content_type=self.export_formats[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _export_records(self, queryset):
+        """Serialized rows, read in chunks from a server-side cursor"""
+        chunk_size = getattr(settings, 'FBS_CONFIG', {}).get('EXPORT', {}).get(
+            'CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+        serializer = self.get_serializer()
+        compiled = compile_read_serializer(serializer)
+
+        if compiled is not None:
+            to_dict = compiled.to_dict
+            for row in compiled.values_list(queryset).iterator(chunk_size=chunk_size):
+                yield to_dict(row)
+            return
+
+        context = self.get_serializer_context()
+        serializer_class = self.get_serializer_class()
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            yield serializer_class(instance, context=context).data
+
+    @staticmethod
+    def _as_csv(records):
+        writer = csv.writer(_Echo())
+        header = None
+        for record in records:
+            if header is None:
+                header = list(record)
+                yield writer.writerow(header)
+            yield writer.writerow([
+                json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in (record.get(column) for column in header)
+            ])
+
+    def _audited(self, chunks, export_format):
+        """Yield the export and audit it once the client has it (or hung up)"""
+        rows = 0
+        completed = False
+        try:
+            for chunk in chunks:
+                rows += 1
+                yield chunk
+            completed = True
+        finally:
+            if export_format == 'csv' and rows:
+                rows -= 1  # Header line
+            self._audit_export(export_format, rows, completed)
+
+    @staticmethod
+    def _sync_stream(chunks, solution_name):
+        """WSGI: the body is sent after the middleware has reset the tenant context"""
+        with solution_context(solution_name):
+            yield from chunks
+
+    @staticmethod
+    async def _async_stream(chunks, solution_name):
+        """ASGI: pull batches of lines from the sync generator without blocking the loop"""
+        batch_size = getattr(settings, 'FBS_CONFIG', {}).get('EXPORT', {}).get(
+            'ASYNC_BATCH_SIZE', DEFAULT_EXPORT_ASYNC_BATCH_SIZE)
+
+        # Each call sets and resets the context itself: asgiref runs every
+        # call in a copy of the context, so a token cannot span calls
+        def next_batch():
+            with solution_context(solution_name):
+                return ''.join(islice(chunks, batch_size))
+
+        def close():
+            with solution_context(solution_name):
+                chunks.close()
+
+        # thread_sensitive (the default) keeps the cursor on the thread
+        # and connection that opened it
+        try:
+            while True:
+                batch = await sync_to_async(next_batch)()
+                if not batch:
+                    break
+                yield batch
+        finally:
+            await sync_to_async(close)()
+
+    def _audit_export(self, export_format, rows, completed):
+        request = self.request
+        log_audit_event(
+            action='export',
+            resource_type=self.export_resource_type or self.basename,
+            resource_id='*',
+            solution=getattr(request.user, 'solution', None),
+            user=request.user,
+            details={
+                'format': export_format,
+                'rows': rows,
+                'completed': completed,
+                'filters': {key: value for key, value in request.query_params.items()
+                            if key != 'export_format'},
+            },
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT'),
+        )
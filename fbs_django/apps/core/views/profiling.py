@@ -0,0 +1,36 @@
+"""
+FBS Profiling Endpoints
+
+Admin access to request profiles stored by the sampling profiler.
+"""
+from django.http import FileResponse, Http404
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..utils.profiler import get_profile_path, list_profiles, request_profiler
+
+
+class ProfileListView(APIView):
+    """Stored request profiles, newest first"""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'available': request_profiler.available,
+            'mode': request_profiler.mode,
+            'profiles': list_profiles(),
+        })
+
+
+class ProfileDetailView(APIView):
+    """One profile as collapsed stacks (flamegraph.pl / speedscope input)"""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, name):
+        path = get_profile_path(name)
+        if path is None:
+            raise Http404("Profile not found")
+        return FileResponse(open(path, 'rb'), content_type='text/plain; charset=utf-8', filename=name)
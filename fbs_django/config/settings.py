@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Audit search indexes (requires the pg_trgm extension)
 
     # Third-party
     'rest_framework',
@@ -76,8 +77,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
     # FBS Custom Middleware
+    'apps.core.middleware.AuditBatchMiddleware',
     'apps.core.middleware.DatabaseRouterMiddleware',
     'apps.core.middleware.RequestLoggingMiddleware',
+    'apps.core.middleware.PerformanceMonitoringMiddleware',
+    'apps.core.middleware.QueryMetricsMiddleware',
 ]
 
 # ============================================================================
@@ -156,6 +160,113 @@ FBS_CONFIG = {
     'REDIS_URL': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
     'CACHE_TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
     'MAX_UPLOAD_SIZE': int(os.getenv('MAX_UPLOAD_SIZE', '10485760')),  # 10MB
+    # Request sources tried, in order, to resolve the current solution
+    'SOLUTION_RESOLVERS': ['attribute', 'header', 'subdomain', 'url_kwarg', 'query_param'],
+    # Resolve {solution}.<domain> hosts when set (e.g. 'fbs.example.com')
+    'SOLUTION_BASE_DOMAIN': os.getenv('SOLUTION_BASE_DOMAIN', ''),
+    # Seconds before the in-process active solution set is reloaded
+    'SOLUTION_CACHE_TTL': int(os.getenv('SOLUTION_CACHE_TTL', '300')),
+    # Seconds between checks of the shared system settings version
+    'SETTINGS_VERSION_CHECK_INTERVAL': float(os.getenv('SETTINGS_VERSION_CHECK_INTERVAL', '1.0')),
+    'INTERFACE_POOL': {
+        # Warm FBSInterface objects kept per worker process, by (thread, solution, license key)
+        'MAX_SIZE': int(os.getenv('FBS_INTERFACE_POOL_SIZE', '128')),
+        # Seconds before a pooled interface is rebuilt (bounds cross-process staleness)
+        'TTL': int(os.getenv('FBS_INTERFACE_POOL_TTL', '3600')),
+    },
+    'JWT': {
+        'SECRET_KEY': os.getenv('JWT_SECRET_KEY', ''),  # Falls back to SECRET_KEY
+        'ALGORITHM': os.getenv('JWT_ALGORITHM', 'HS256'),
+        'ISSUER': 'fbs-suite',
+        'AUDIENCE': 'fbs-api',
+        # Verified tokens kept until expiry, per worker process
+        'DECODE_CACHE_SIZE': 10000,
+        # Seconds a resolved user/solution principal is reused across requests
+        'PRINCIPAL_CACHE_TTL': int(os.getenv('JWT_PRINCIPAL_CACHE_TTL', '300')),
+    },
+    'AUDIT': {
+        # Queue audit events and write them with bulk_create off the request path
+        'ASYNC': os.getenv('AUDIT_ASYNC', 'True').lower() == 'true',
+        'BATCH_SIZE': int(os.getenv('AUDIT_BATCH_SIZE', '100')),
+        'FLUSH_INTERVAL': float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0')),  # seconds
+        'MAX_QUEUE_SIZE': 10000,
+        # 'memory' keeps unwritten events queued; 'spill' appends them to SPILL_DIR
+        'DURABILITY': os.getenv('AUDIT_DURABILITY', 'memory'),
+        'SPILL_DIR': BASE_DIR / 'var' / 'audit',
+        'SLOW_FLUSH_MS': 500,
+        # Default audit retention; FBSSolution.audit_retention_days overrides per tenant
+        'RETENTION_DAYS': int(os.getenv('AUDIT_RETENTION_DAYS', '365')),
+        # FBSUser fields whose changes alone are not audited (e.g. login bookkeeping)
+        'IGNORED_USER_FIELDS': ['last_login'],
+    },
+    'API_TOKEN_USAGE': {
+        # Seconds between bulk writes of API token last_used_at/usage_count
+        'FLUSH_INTERVAL': int(os.getenv('API_TOKEN_USAGE_FLUSH_INTERVAL', '10')),
+        'MAX_BUFFERED_TOKENS': 1000,
+    },
+    'TENANT_DATABASES': {
+        # Open tenant connections kept per worker thread (LRU-evicted beyond this)
+        'MAX_OPEN_CONNECTIONS': int(os.getenv('TENANT_DB_MAX_OPEN_CONNECTIONS', '16')),
+        # Seconds an idle tenant connection is reused before being recycled
+        'CONN_MAX_AGE': int(os.getenv('TENANT_DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    },
+    'REQUEST_LOGGING': {
+        # Fraction of requests logged per status class (exceptions are always logged)
+        'SAMPLE_RATES': {
+            '2xx': float(os.getenv('REQUEST_LOG_SAMPLE_2XX', '1.0')),
+            '3xx': float(os.getenv('REQUEST_LOG_SAMPLE_3XX', '1.0')),
+            '4xx': 1.0,
+            '5xx': 1.0,
+        },
+        # Records waiting for the listener thread; extra records are dropped
+        'QUEUE_SIZE': 10000,
+    },
+    'QUERY_METRICS': {
+        # Requests running more SQL queries than this are logged as over budget
+        'BUDGET': int(os.getenv('QUERY_BUDGET', '50')),
+        'SERVER_TIMING': True,
+    },
+    'PROFILING': {
+        # Opt-in sampling profiler for individual requests (sync workers only)
+        'ENABLED': os.getenv('PROFILING_ENABLED', 'False').lower() == 'true',
+        # X-FBS-Profile header value that forces a profile (unset: header ignored)
+        'HEADER_TOKEN': os.getenv('PROFILING_HEADER_TOKEN', ''),
+        # Fraction of requests profiled at random
+        'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),
+        # Sampled and per-solution profiles are kept only for requests this slow
+        'MIN_DURATION_MS': 1000,
+        'INTERVAL_MS': 5,
+        # 'cpu' (SIGPROF, on-CPU time) or 'wall' (SIGALRM, includes I/O waits)
+        'MODE': os.getenv('PROFILING_MODE', 'cpu'),
+        'PROFILE_DIR': BASE_DIR / 'var' / 'profiles',
+        'MAX_FILES': 200,
+    },
+    'METRICS': {
+        # Latency series (route x method x solution) kept per process
+        'MAX_SERIES': 5000,
+        'QUANTILES': [0.5, 0.95, 0.99],
+        # Bearer token required to scrape /metrics (unset: 404 unless DEBUG)
+        'TOKEN': os.getenv('METRICS_TOKEN', ''),
+    },
+    # Compiled list serializers kept per process (one per class and ?fields= subset)
+    'COMPILED_SERIALIZER_CACHE_SIZE': 256,
+    'EXPORT': {
+        # Rows fetched per round trip by the streaming export server-side cursor
+        'CHUNK_SIZE': int(os.getenv('EXPORT_CHUNK_SIZE', '2000')),
+        # Lines handed to the event loop per thread hop when served over ASGI
+        'ASYNC_BATCH_SIZE': int(os.getenv('EXPORT_ASYNC_BATCH_SIZE', '500')),
+    },
+    'PAGINATION': {
+        # Above this many rows list endpoints report the planner's count estimate
+        'COUNT_ESTIMATE_THRESHOLD': int(os.getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD', '10000')),
+    },
+    'TENANT_HEALTH': {
+        # Seconds between background probes of every tenant database
+        'INTERVAL': int(os.getenv('TENANT_HEALTH_INTERVAL', '30')),
+        'CONNECT_TIMEOUT': 3,
+        'MAX_WORKERS': 8,
+    },
 }
 
 # ============================================================================
@@ -202,6 +313,17 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = os.getenv('TIME_ZONE', 'UTC')
 
+CELERY_BEAT_SCHEDULE = {
+    'maintain-audit-partitions': {
+        'task': 'apps.core.tasks.maintain_audit_partitions',
+        'schedule': 24 * 60 * 60,  # daily
+    },
+    'probe-tenant-databases': {
+        'task': 'apps.core.tasks.probe_tenant_databases',
+        'schedule': int(os.getenv('TENANT_HEALTH_INTERVAL', '30')),
+    },
+}
+
 # ============================================================================
 # CACHING CONFIGURATION
 # ============================================================================
@@ -8,6 +8,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views.metrics import MetricsView
+
 urlpatterns = [
     # Django Admin
     path('admin/', admin.site.urls),
@@ -33,6 +35,9 @@ urlpatterns = [
 
     # Health Check (always available)
     path('health/', include('apps.core.urls_health')),
+
+    # Prometheus scrape target
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 # Static and Media files in development
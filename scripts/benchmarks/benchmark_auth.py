@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+FBSTokenAuthentication per-request cost benchmark
+
+Compares the legacy JWT path (settings lookup, full PyJWT verification and
+a manual ``exp`` re-check on every request) against the compiled config and
+verified-token cache. Database lookups are excluded; see the principal and
+API key caches for those.
+
+Usage:
+    python scripts/benchmarks/benchmark_auth.py [iterations]
+"""
+import sys
+from datetime import datetime, timedelta
+
+from django_setup import measure, setup_django, report
+
+
+def legacy_decode(token):
+    """JWT decoding as it was before the compiled config and cache"""
+    import jwt
+    from django.conf import settings
+    from django.utils import timezone
+
+    try:
+        jwt_config = getattr(settings, 'FBS_CONFIG', {}).get('JWT', {})
+        secret_key = jwt_config.get('SECRET_KEY') or getattr(settings, 'SECRET_KEY', 'fbs-jwt-secret')
+        algorithm = jwt_config.get('ALGORITHM', 'HS256')
+
+        payload = jwt.decode(token, secret_key, algorithms=[algorithm], audience='fbs-api')
+
+        if payload.get('exp'):
+            exp_timestamp = payload['exp']
+            if isinstance(exp_timestamp, int):
+                exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.get_current_timezone())
+                if timezone.now() > exp_datetime:
+                    return None
+
+        return payload
+    except Exception:
+        return None
+
+
+class _Stub:
+    """Minimal user/solution stand-in for token generation"""
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    setup_django()
+
+    from apps.core.authentication.token_auth import FBSTokenAuthentication, _decoded_tokens
+
+    solution = _Stub(id=1, name='bench')
+    user = _Stub(id=1, username='bench-user')
+    token = FBSTokenAuthentication.generate_jwt_token(user, solution, expires_in=timedelta(hours=1))
+    auth = FBSTokenAuthentication()
+
+    assert legacy_decode(token) is not None
+    assert auth.decode_jwt_token(token) is not None
+
+    def uncached_decode():
+        _decoded_tokens.clear()
+        return auth.decode_jwt_token(token)
+
+    print("JWT verification per request")
+    print("-" * 80)
+    report("legacy   decode (settings + verify + exp check)",
+           measure(lambda: legacy_decode(token), iterations), iterations)
+    report("compiled decode, cache miss",
+           measure(uncached_decode, iterations), iterations)
+    report("compiled decode, cache hit",
+           measure(lambda: auth.decode_jwt_token(token), iterations), iterations)
+    report("api key  non-JWT short-circuit",
+           measure(lambda: auth.decode_jwt_token('x' * 43), iterations), iterations)
+
+
+if __name__ == '__main__':
+    main()
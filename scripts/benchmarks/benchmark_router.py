@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+FBSDatabaseRouter routing overhead benchmark
+
+Compares the per-query cost of the legacy routing logic (``hasattr`` probe
+on every call, model imports inside ``_is_system_model``) against the
+precomputed routing table built in ``CoreConfig.ready()``.
+
+Usage:
+    python scripts/benchmarks/benchmark_router.py [iterations]
+"""
+import sys
+
+from django_setup import measure, setup_django, report
+
+
+class LegacyRouter:
+    """Routing logic as it was before the routing table"""
+
+    def __init__(self, get_current_solution):
+        self._get_current_solution = get_current_solution
+
+    def db_for_read(self, model, **hints):
+        solution_name = self._get_current_solution()
+        if solution_name and hasattr(model, 'solution'):
+            return f'djo_{solution_name}_db'
+        return 'default'
+
+    def is_system_model(self, model_class) -> bool:
+        from apps.core.models import FBSSolution, FBSSystemSettings
+        return model_class in [FBSSolution, FBSSystemSettings]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    setup_django()
+
+    from apps.core.models import FBSUser, FBSAuditLog, FBSSystemSettings
+    from apps.core.middleware.database_router import (
+        FBSDatabaseRouter, get_current_solution, get_model_route, solution_context,
+    )
+    from apps.core.utils.tenant_connections import tenant_connections
+
+    legacy = LegacyRouter(get_current_solution)
+    router = FBSDatabaseRouter()
+
+    print("Routing overhead per call")
+    print("-" * 80)
+    with solution_context('bench'):
+        # Warm the alias registry so both variants measure routing only
+        router.db_for_read(FBSUser)
+
+        for model in (FBSUser, FBSAuditLog, FBSSystemSettings):
+            name = model.__name__
+            report(f"legacy   db_for_read({name})",
+                   measure(lambda: legacy.db_for_read(model), iterations), iterations)
+            report(f"table    db_for_read({name})",
+                   measure(lambda: router.db_for_read(model), iterations), iterations)
+
+        report("legacy   _is_system_model",
+               measure(lambda: legacy.is_system_model(FBSAuditLog), iterations), iterations)
+        report("table    get_model_route",
+               measure(lambda: get_model_route(FBSAuditLog), iterations), iterations)
+        report("         tenant_connections.acquire",
+               measure(lambda: tenant_connections.acquire('bench'), iterations), iterations)
+
+
+if __name__ == '__main__':
+    main()
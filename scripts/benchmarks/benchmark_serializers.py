@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+List serialization throughput benchmark
+
+Compares ``FBSAuditLogSerializer(many=True).data`` and
+``FBSUserSerializer(many=True).data`` on model instances against the
+compiled read serializers fed with ``values_list()``-shaped rows, for pages
+of 1k and 10k rows, and checks the outputs are identical. Database fetch
+time is excluded: both variants start from rows already in memory.
+
+Usage:
+    python scripts/benchmarks/benchmark_serializers.py [repeat]
+"""
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from django_setup import setup_django
+
+
+def build_audit_logs(count, solution, users):
+    from apps.core.models import FBSAuditLog
+
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    user_field = FBSAuditLog._meta.get_field('user')
+    solution_field = FBSAuditLog._meta.get_field('solution')
+    logs = []
+    for index in range(count):
+        # Every tenth row is a system event without a user
+        user = None if index % 10 == 0 else users[index % len(users)]
+        log = FBSAuditLog(
+            id=index + 1,
+            user_id=user.id if user else None,
+            solution_id=solution.id,
+            action='update',
+            resource_type='user',
+            resource_id=str(index),
+            details={'changes': {'email': {'old': 'a@example.com', 'new': 'b@example.com'}}},
+            ip_address='10.0.0.1',
+            user_agent='bench/1.0',
+            timestamp=started + timedelta(seconds=index),
+        )
+        # Set the keys directly and prime the relation caches, so building
+        # rows never goes through the router or the (absent) database
+        user_field.set_cached_value(log, user)
+        solution_field.set_cached_value(log, solution)
+        logs.append(log)
+    return logs
+
+
+def build_users(count, solution):
+    from apps.core.models import FBSUser
+
+    joined = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    solution_field = FBSUser._meta.get_field('solution')
+    users = []
+    for index in range(count):
+        user = FBSUser(
+            id=index + 1,
+            username=f'user{index}',
+            email=f'user{index}@example.com',
+            first_name='Bench',
+            last_name=f'User {index}',
+            is_active=True,
+            date_joined=joined + timedelta(minutes=index),
+            last_login=None if index % 3 else joined,
+            solution_id=solution.id,
+            odoo_user_id=index,
+            phone='',
+            department='Sales',
+        )
+        solution_field.set_cached_value(user, solution)
+        users.append(user)
+    return users
+
+
+def as_rows(instances, columns):
+    """Shape instances like values_list(*columns) rows"""
+    def value(instance, path):
+        *relations, last = path.split('__')
+        for attr in relations:
+            instance = getattr(instance, attr)
+            if instance is None:
+                return None
+        # The final column is the raw value (the key, for a relation)
+        return getattr(instance, instance._meta.get_field(last).attname)
+
+    return [tuple(value(instance, column) for column in columns) for instance in instances]
+
+
+def measure(label, rows, func, repeat):
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"{label:<44} {rows / best:>12,.0f} rows/s  ({best * 1000:8.1f} ms/page)")
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    setup_django()
+
+    from apps.core.models import FBSSolution
+    from apps.core.serializers import FBSAuditLogSerializer, FBSUserSerializer
+    from apps.core.serializers.compiled import compile_read_serializer
+
+    solution = FBSSolution(id=1, name='bench', display_name='Bench')
+    users = build_users(50, solution)
+
+    for serializer_class, build in ((FBSAuditLogSerializer, lambda n: build_audit_logs(n, solution, users)),
+                                    (FBSUserSerializer, lambda n: build_users(n, solution))):
+        compiled = compile_read_serializer(serializer_class())
+        assert compiled is not None, f'{serializer_class.__name__} did not compile'
+
+        print(serializer_class.__name__)
+        print("-" * 80)
+        for size in (1_000, 10_000):
+            instances = build(size)
+            rows = as_rows(instances, compiled.columns)
+
+            expected = [dict(item) for item in serializer_class(instances, many=True).data]
+            assert compiled.serialize(rows) == expected, 'compiled output differs'
+
+            measure(f"ModelSerializer  {size:>6,} rows", size,
+                    lambda: serializer_class(instances, many=True).data, repeat)
+            measure(f"compiled         {size:>6,} rows", size,
+                    lambda: compiled.serialize(rows), repeat)
+        print()
+
+
+if __name__ == '__main__':
+    main()
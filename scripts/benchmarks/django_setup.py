@@ -0,0 +1,67 @@
+"""
+Minimal Django bootstrap for FBS microbenchmarks.
+
+Configures an in-memory SQLite database and only the apps needed to import
+the FBS core models, so benchmarks run without Postgres, Redis or Odoo.
+"""
+import os
+import sys
+import timeit
+
+import django
+from django.conf import settings
+
+FBS_DJANGO_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'fbs_django',
+)
+
+
+def setup_django(**overrides):
+    """Configure and initialise Django for benchmarking"""
+    if settings.configured:
+        return
+
+    sys.path.insert(0, FBS_DJANGO_DIR)
+
+    config = {
+        'DEBUG': False,
+        # HS256 keys shorter than 32 bytes trigger PyJWT warnings
+        'SECRET_KEY': 'fbs-benchmark-secret-key-0123456789abcdefghijklmnop',
+        'USE_TZ': True,
+        'INSTALLED_APPS': [
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'rest_framework',
+            'apps.core',
+        ],
+        'AUTH_USER_MODEL': 'fbs_core.FBSUser',
+        'DATABASES': {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            }
+        },
+        'CACHES': {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        },
+        'DATABASE_ROUTERS': ['apps.core.database_router.FBSDatabaseRouter'],
+        'FBS_CONFIG': {},
+    }
+    config.update(overrides)
+
+    settings.configure(**config)
+    django.setup()
+
+
+def measure(func, iterations: int, repeat: int = 5) -> float:
+    """Best of ``repeat`` timings of ``iterations`` calls, in seconds"""
+    return min(timeit.repeat(func, number=iterations, repeat=repeat))
+
+
+def report(label: str, seconds: float, iterations: int):
+    """Print a per-operation timing line"""
+    per_op_ns = seconds / iterations * 1e9
+    print(f"{label:<48} {per_op_ns:>10.1f} ns/op  ({iterations:,} iterations)")